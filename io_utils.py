@@ -0,0 +1,98 @@
+# Funções auxiliares de entrada compartilhadas pelos scripts (seleção de arquivos com Tkinter, leitura de CSV e cópias em Parquet)
+
+import atexit
+import hashlib
+import os
+import pandas as pd
+
+# PyArrow (opcional): cópias em Parquet dos dados de entrada (read_cached); sem ele, o arquivo original é lido sempre
+try:
+    import pyarrow
+    TEM_PYARROW = True
+except ImportError:
+    TEM_PYARROW = False
+
+# Janela raiz do Tkinter, criada apenas na primeira seleção e reaproveitada pelas seguintes
+_root = None
+
+def _destroy_root():
+    """Libera o interpretador Tk ao final da execução, se ele tiver sido criado."""
+    global _root
+    if _root is not None:
+        _root.destroy()
+        _root = None
+
+def select_file(title, filetypes=(("Todos os arquivos", "*.*"),)):
+    """
+    Abre a caixa de diálogo para seleção de um arquivo e retorna o caminho escolhido
+    (string vazia se o usuário cancelar). A janela principal do Tkinter fica oculta.
+    """
+    # Importação adiada: quem só usa as funções de leitura abaixo não carrega o Tkinter
+    import tkinter as tk
+    from tkinter import filedialog
+
+    global _root
+    if _root is None:
+        _root = tk.Tk()
+        _root.withdraw()
+        atexit.register(_destroy_root)
+    return filedialog.askopenfilename(title=title, filetypes=filetypes)
+
+def column_positions(columns, wanted_cols) -> list:
+    """Posições da primeira coluna (índice das amostras) e das colunas em wanted_cols, comparando os nomes sem espaços nas bordas."""
+    wanted = set(wanted_cols)
+    return [0] + [i for i in range(1, len(columns)) if str(columns[i]).strip() in wanted]
+
+def read_csv_columns(file_path, wanted_cols, engine='c', sep=',', dtype=None, **options):
+    """
+    Lê do CSV só a primeira coluna (usada como índice) e as colunas em wanted_cols;
+    as ausentes no arquivo são ignoradas. dtype (dicionário por nome) vale só para as colunas lidas.
+
+    As colunas são escolhidas pela posição no cabeçalho. O motor PyArrow só aceita usecols por nome
+    e não conhece os nomes 'Unnamed: N' que o pandas dá às colunas sem cabeçalho (ex: o índice salvo
+    pelo to_csv sem nome); nesse caso a leitura é feita com o motor C.
+    """
+    columns = pd.read_csv(file_path, sep=sep, nrows=0).columns
+    positions = column_positions(columns, wanted_cols)
+    names = [columns[i] for i in positions]
+    if dtype is not None:
+        dtype = {col: tipo for col, tipo in dtype.items() if col in names}
+
+    if engine == 'pyarrow':
+        if not any(str(name).startswith('Unnamed:') for name in names):
+            return pd.read_csv(file_path, sep=sep, index_col=0, usecols=names, dtype=dtype, engine='pyarrow', **options)
+        engine = 'c'
+    return pd.read_csv(file_path, sep=sep, index_col=0, usecols=positions, dtype=dtype, engine=engine, **options)
+
+def parquet_cache_path(file_path, key) -> str:
+    """Caminho da cópia em Parquet de file_path para a leitura identificada por key (um hash curto de repr(key) no nome)."""
+    digest = hashlib.blake2b(repr(key).encode(), digest_size=4).hexdigest()
+    return f"{file_path}.{digest}.parquet"
+
+def read_cached(file_path, key, read, **parquet_options):
+    """
+    Retorna o DataFrame de read() (a leitura de file_path), guardado numa cópia em Parquet ao lado
+    do arquivo e reaproveitado enquanto ela for mais nova que ele. key descreve a leitura (colunas,
+    tipos, planilha, separador...): leituras diferentes do mesmo arquivo ficam em cópias diferentes.
+    parquet_options vão para o pd.read_parquet. Sem o PyArrow, só chama read().
+    """
+    if not TEM_PYARROW:
+        return read()
+
+    parquet_path = parquet_cache_path(file_path, key)
+    if os.path.exists(parquet_path) and os.path.getmtime(parquet_path) >= os.path.getmtime(file_path):
+        try:
+            data = pd.read_parquet(parquet_path, engine='pyarrow', **parquet_options)
+            print(f"Usando a cópia em Parquet: {parquet_path}")
+            return data
+        except Exception as e:
+            print(f"Falha na leitura da cópia em Parquet ({e}). Lendo o arquivo original...")
+
+    data = read()
+    # Uma falha ao salvar a cópia não interrompe a análise (read() pode retornar None em caso de erro)
+    if data is not None:
+        try:
+            data.to_parquet(parquet_path, engine='pyarrow', compression='zstd')
+        except Exception as e:
+            print(f"Aviso: não foi possível salvar a cópia em Parquet: {e}")
+    return data
@@ -1,9 +1,13 @@
+import matplotlib
 import matplotlib.pyplot as plt
 import numpy as np
-import pandas as pd
-import tkinter as tk
-from tkinter import filedialog
+import codecs
+import csv
+import itertools
+import mmap
+from io_utils import select_file
 import sys
+import argparse
 
 # Dados de fallback (dados originais extraídos)
 # O subtipo 'Normal' (118) foi removido das contagens para plotagem e análise.
@@ -16,18 +20,36 @@ DADOS_FALLBACK = {
     'Total_Dataset': 1215 # Total de pacientes listado no documento
 }
 
-def carregar_dados_pam50():
-    """Abre uma caixa de diálogo para o usuário selecionar o arquivo CSV e extrai os dados PAM50 (excluindo 'Normal')."""
+def encontrar_linha_cabecalho(mm, campo):
+    """
+    Posição, no arquivo mapeado, da linha cujo primeiro campo é exatamente `campo` (bytes), ou -1.
+    A linha pode ser a primeira do arquivo (com ou sem BOM) e terminar em \n ou \r\n;
+    um campo que só começa com o mesmo texto (ex: 'PAM50 Subtipo_old') não conta.
+    """
+    inicio = 0
+    while True:
+        posicao = mm.find(campo, inicio)
+        if posicao == -1:
+            return -1
+        fim = posicao + len(campo)
+        inicio_da_linha = posicao == 0 or mm[posicao - 1:posicao] == b'\n' or mm[:posicao] == codecs.BOM_UTF8
+        fim_do_campo = fim == len(mm) or mm[fim:fim + 1] in (b',', b'\r', b'\n')
+        if inicio_da_linha and fim_do_campo:
+            return posicao
+        inicio = fim
+
+def carregar_dados_pam50(caminho_arquivo=None):
+    """
+    Extrai os dados PAM50 (excluindo 'Normal') do arquivo CSV informado. Se nenhum caminho
+    for passado, abre uma caixa de diálogo para o usuário selecionar o arquivo.
+    """
     
-    # Esconde a janela principal do Tkinter
-    root = tk.Tk()
-    root.withdraw() 
-    
-    # Abre a caixa de diálogo para seleção de arquivo CSV
-    caminho_arquivo = filedialog.askopenfilename(
-        title="Selecione o arquivo CSV da Análise Estatística (Analise_Estatistica.csv)",
-        filetypes=[("Arquivos CSV", "*.csv"), ("Todos os arquivos", "*.*")]
-    )
+    if caminho_arquivo is None:
+        # Abre a caixa de diálogo para seleção de arquivo CSV
+        caminho_arquivo = select_file(
+            title="Selecione o arquivo CSV da Análise Estatística (Analise_Estatistica.csv)",
+            filetypes=[("Arquivos CSV", "*.csv"), ("Todos os arquivos", "*.*")]
+        )
     
     if not caminho_arquivo:
         # Retorna os dados de fallback se nenhum arquivo for selecionado
@@ -35,32 +57,38 @@ def carregar_dados_pam50():
         return DADOS_FALLBACK['LumA'], DADOS_FALLBACK['LumB'], DADOS_FALLBACK['Her2'], DADOS_FALLBACK['Basal'], DADOS_FALLBACK['Total_Classificado_PAM50'], DADOS_FALLBACK['Total_Dataset']
 
     try:
-        # Carrega o arquivo inteiro.
-        df_completo = pd.read_csv(caminho_arquivo, header=None)
-        
-        # 1. Tenta extrair o Total de Pacientes (Valor '1215' esperado na linha de índice 1, coluna 0)
-        total_dataset = int(df_completo.iloc[1, 0])
-        
-        # 2. Localiza a tabela PAM50
-        start_row_pam50 = df_completo[df_completo.iloc[:, 0] == 'PAM50 Subtipo'].index
-        
-        if start_row_pam50.empty:
+        # O arquivo é mapeado em memória: só as duas primeiras linhas e a tabela PAM50
+        # são decodificadas; a busca pelo cabeçalho salta direto para a sua posição,
+        # sem passar as linhas intermediárias do relatório pelo leitor CSV.
+        total_dataset = None
+        dados_pam50 = {}
+        with open(caminho_arquivo, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            # 1. Tenta extrair o Total de Pacientes (Valor '1215' esperado na linha de índice 1, coluna 0)
+            linhas_iniciais = list(csv.reader([mm.readline().decode('utf-8-sig') for _ in range(2)]))
+            if len(linhas_iniciais) > 1 and linhas_iniciais[1]:
+                total_dataset = int(linhas_iniciais[1][0])
+
+            # 2. Lê a tabela PAM50: as 5 linhas seguintes ao cabeçalho (LumA, LumB, Basal, Normal, Her2)
+            # Colunas de Subtipo e Contagem Absoluta (colunas 0 e 1)
+            posicao = encontrar_linha_cabecalho(mm, b'PAM50 Subtipo')
+            if posicao != -1:
+                mm.seek(posicao)
+                linhas_tabela = [mm.readline().decode('utf-8') for _ in range(6)]
+                for linha_pam50 in itertools.islice(csv.reader(linhas_tabela), 1, None):
+                    if linha_pam50:
+                        dados_pam50[linha_pam50[0]] = int(linha_pam50[1])
+
+        if total_dataset is None:
+            raise ValueError("Não foi possível encontrar o Total de Pacientes no arquivo.")
+        if not dados_pam50:
             raise ValueError("Não foi possível encontrar o cabeçalho 'PAM50 Subtipo' no arquivo.")
-            
-        # O início dos dados é a linha seguinte ao cabeçalho (data frame tem 5 linhas: LumA, LumB, Basal, Normal, Her2)
-        start_row_data = start_row_pam50[0] + 1
-        
-        # Seleciona as colunas de Subtipo e Contagem Absoluta (colunas 0 e 1)
-        df_pam50 = df_completo.iloc[start_row_data : start_row_data + 5, :2].copy()
-        df_pam50.columns = ['Subtipo', 'Contagem']
-        df_pam50 = df_pam50.set_index('Subtipo')['Contagem'].to_dict()
 
         # Extrai os valores dos 4 subtipos clínicos
-        lum_a = df_pam50.get('LumA', 0)
-        lum_b = df_pam50.get('LumB', 0)
-        her2 = df_pam50.get('Her2', 0)
-        basal = df_pam50.get('Basal', 0)
-        normal = df_pam50.get('Normal', 0) # Ainda extrai 'Normal' para calcular o total classificado
+        lum_a = dados_pam50.get('LumA', 0)
+        lum_b = dados_pam50.get('LumB', 0)
+        her2 = dados_pam50.get('Her2', 0)
+        basal = dados_pam50.get('Basal', 0)
+        normal = dados_pam50.get('Normal', 0) # Ainda extrai 'Normal' para calcular o total classificado
         
         total_classificado_pam50 = lum_a + lum_b + her2 + basal + normal
 
@@ -72,8 +100,18 @@ def carregar_dados_pam50():
         # Retorna os dados de fallback em caso de qualquer erro de processamento
         return DADOS_FALLBACK['LumA'], DADOS_FALLBACK['LumB'], DADOS_FALLBACK['Her2'], DADOS_FALLBACK['Basal'], DADOS_FALLBACK['Total_Classificado_PAM50'], DADOS_FALLBACK['Total_Dataset']
 
+# O arquivo pode ser passado na linha de comando; sem ele, a caixa de diálogo é aberta
+parser = argparse.ArgumentParser(description="Gráfico da distribuição de amostras por subtipo PAM50.")
+parser.add_argument('--analise', help="Arquivo CSV da Análise Estatística (Analise_Estatistica.csv)")
+parser.add_argument('--salvar', help="Salva o gráfico neste arquivo (ex: grafico.png) em vez de exibi-lo")
+args = parser.parse_args()
+
+if args.salvar:
+    # Execução em lote: backend sem interface gráfica
+    matplotlib.use('Agg')
+
 # Chama a função de carregamento para obter os dados
-lum_a_count, lum_b_count, her2_count, basal_count, TOTAL_CLASSIFICADO_PAM50, TOTAL_DATASET = carregar_dados_pam50()
+lum_a_count, lum_b_count, her2_count, basal_count, TOTAL_CLASSIFICADO_PAM50, TOTAL_DATASET = carregar_dados_pam50(args.analise)
 
 # -----------------------------------------------------------
 # Configuração dos Dados para Plotagem (Apenas 4 subtipos)
@@ -100,7 +138,8 @@ print("=========================================================================
 porcentagens = (contagens / TOTAL_CLASSIFICADO_PAM50) * 100
 
 # Formata as porcentagens para serem exibidas como rótulos
-rotulos_porcentagem = [f'{p:.1f}%' for p in porcentagens]
+# (formatação vetorizada; mesmo resultado de f'{p:.1f}%' para cada elemento)
+rotulos_porcentagem = np.char.mod('%.1f%%', porcentagens)
 
 # -----------------------------------------------------------
 # 2. Configuração e Criação do Gráfico
@@ -121,12 +160,14 @@ barras = ax.bar(
 )
 
 # Adiciona o rótulo de porcentagem em cima de cada barra
-for i, barra in enumerate(barras):
-    altura = barra.get_height()
+# Posição X (centro de cada barra), calculada uma única vez fora do laço
+centros_x = np.array([barra.get_x() + barra.get_width() / 2 for barra in barras])
+
+for i in range(len(barras)):
     # Adiciona o texto no topo da barra
     ax.text(
-        barra.get_x() + barra.get_width() / 2, # Posição X (centro da barra)
-        altura + 5,                             # Posição Y (um pouco acima da barra)
+        centros_x[i],                           # Posição X (centro da barra)
+        contagens[i] + 5,                       # Posição Y (um pouco acima da barra)
         rotulos_porcentagem[i],                 # O texto da porcentagem
         ha='center',                            # Alinhamento horizontal (centralizado)
         va='bottom',                            # Alinhamento vertical (abaixo da posição)
@@ -157,6 +198,13 @@ ax.spines['top'].set_visible(False)
 # Adiciona grid ao eixo Y (opcional, para melhor leitura dos valores)
 # ax.grid(axis='y', linestyle='--', alpha=0.7) 
 
-# Exibe o gráfico
+# Exibe (ou salva) o gráfico
 plt.tight_layout() # Ajusta o layout para evitar sobreposição
-plt.show()
\ No newline at end of file
+if args.salvar:
+    fig.savefig(args.salvar, dpi=300)
+    print(f"Gráfico salvo em: {args.salvar}")
+else:
+    plt.show()
+
+# Libera a figura (e seus buffers de pixels) depois de exibida/salva
+plt.close(fig)
\ No newline at end of file
@@ -1,15 +1,57 @@
 import pandas as pd
+import numpy as np
+import matplotlib
 import matplotlib.pyplot as plt
 import io
-import tkinter as tk
-from tkinter import filedialog
+import os
+from io_utils import select_file, read_cached
 import sys
+import argparse
+from functools import lru_cache
 
-def load_and_analyze_data():
+# Numba (opcional): compila a contagem por subtipo em paralelo para painéis grandes de genes
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+
+if njit is not None:
+    @njit(parallel=True, cache=True)
+    def count_expressed_by_subtype(expr, codes, n_subtypes):
+        """
+        Soma a matriz binária pacientes x genes por subtipo (matriz subtipos x genes).
+        O laço paralelo percorre os genes, assim cada thread escreve em uma coluna própria.
+        """
+        n_genes = expr.shape[1]
+        out = np.zeros((n_subtypes, n_genes), np.int64)
+        for g in prange(n_genes):
+            for i in range(expr.shape[0]):
+                out[codes[i], g] += expr[i, g]
+        return out
+
+@lru_cache(maxsize=None)
+def read_sheet_cached(file_path, sheet_name, mtime):
+    """
+    Lê a aba do Excel reaproveitando a cópia em Parquet salva ao lado do arquivo
+    (read_cached). O mtime faz parte da chave do cache em memória para que uma
+    planilha alterada seja relida.
+    """
+    def read_sheet():
+        try:
+            # Motor calamine (Rust, python-calamine): lê o .xlsx sem montar os objetos de célula do openpyxl
+            return pd.read_excel(file_path, sheet_name=sheet_name, header=0, engine='calamine')
+        except ImportError:
+            return pd.read_excel(file_path, sheet_name=sheet_name, header=0)
+
+    return read_cached(file_path, ('planilha', sheet_name), read_sheet)
+
+def load_and_analyze_data(file_path=None, save_path=None):
     """
     Carrega o arquivo EXCEL de dados de pacientes (PAM50 e expressão gênica),
     processa os dados para calcular a frequência e a contagem absoluta de expressão 
     de genes individuais e plota o gráfico de barras empilhadas por subtipo PAM50.
+    Se file_path não for informado, o arquivo é selecionado pelo Tkinter filedialog.
+    Se save_path for informado, o gráfico é salvo nesse arquivo em vez de exibido.
     """
     
     # ----------------------------------------------------------------------
@@ -30,38 +72,28 @@ def load_and_analyze_data():
     DARK_COLORS = ['#377eb8', '#984ea3']
     # ----------------------------------------------------------------------
     
-    # 1. Seleção do Arquivo com Tkinter filedialog
+    # 1. Seleção do Arquivo (argumento da linha de comando ou Tkinter filedialog)
+    if file_path is None:
+        # MENSAGEM ATUALIZADA PARA EXCEL
+        print("Aguardando a seleção do arquivo Excel (ex: 'Analise_Genes_20251123_2036.xlsx')...")
     
-    # Inicializa o Tkinter e esconde a janela principal
-    root = tk.Tk()
-    root.withdraw() 
-    
-    # MENSAGEM ATUALIZADA PARA EXCEL
-    print("Aguardando a seleção do arquivo Excel (ex: 'Analise_Genes_20251123_2036.xlsx')...")
-    
-    # Abre o diálogo para seleção de arquivo EXCEL
-    file_path = filedialog.askopenfilename(
-        title="Selecione o arquivo Excel de Dados de Pacientes",
-        # TIPOS DE ARQUIVO ATUALIZADOS PARA EXCEL
-        filetypes=[("Arquivos Excel", "*.xlsx"), ("Todos os arquivos", "*.*")]
-    )
+        # Abre o diálogo para seleção de arquivo EXCEL
+        file_path = select_file(
+            title="Selecione o arquivo Excel de Dados de Pacientes",
+            # TIPOS DE ARQUIVO ATUALIZADOS PARA EXCEL
+            filetypes=[("Arquivos Excel", "*.xlsx"), ("Todos os arquivos", "*.*")]
+        )
     
-    # Verifica se o usuário selecionou um arquivo
-    if not file_path:
-        print("Nenhum arquivo selecionado. Encerrando a análise.")
-        # Se um root foi criado, ele deve ser destruído.
-        if 'root' in locals():
-            root.destroy()
-        return
-
-    # Certifica-se de destruir a instância do Tk após o uso do filedialog
-    if 'root' in locals():
-        root.destroy()
+        # Verifica se o usuário selecionou um arquivo
+        if not file_path:
+            print("Nenhum arquivo selecionado. Encerrando a análise.")
+            return
 
     # 2. Carregamento e Pré-processamento dos Dados
     try:
         # Carrega o arquivo Excel, especificando a aba. O cabeçalho é na linha 1 (header=0).
-        df = pd.read_excel(file_path, sheet_name=SHEET_NAME, header=0)
+        # (o resultado é cacheado; o DataFrame retornado não deve ser alterado no lugar)
+        df = read_sheet_cached(file_path, SHEET_NAME, os.path.getmtime(file_path))
         
         # Renomeia a coluna PAM50.
         if len(df.columns) > 1:
@@ -82,27 +114,26 @@ def load_and_analyze_data():
         df = df[required_cols].copy()
         df[GENES_OF_INTEREST] = df[GENES_OF_INTEREST].apply(pd.to_numeric, errors='coerce')
         
-        # Remove pacientes sem subtipo PAM50 (NaN na coluna Subtype)
-        df = df.dropna(subset=['PAM50Subtype'])
-        
-        # FILTRAGEM: Exclui o subtipo 'Normal' da análise
-        df = df[df['PAM50Subtype'] != 'Normal'].copy()
+        # FILTRAGEM em uma única passada: mantém apenas os 4 subtipos de SUBTYPE_ORDER,
+        # o que já exclui pacientes sem subtipo PAM50 (NaN) e o subtipo 'Normal'
+        df = df.loc[df['PAM50Subtype'].isin(SUBTYPE_ORDER)].copy()
         print("Subtipo 'Normal' excluído da análise.")
         
-        # REORDENAMENTO: Define a ordem desejada dos subtipos
-        df['PAM50Subtype'] = pd.Categorical(
-            df['PAM50Subtype'], 
-            categories=SUBTYPE_ORDER, 
-            ordered=True
-        )
-        # Remove quaisquer linhas que possam ter se tornado NaN devido à categorização (embora a linha anterior de filtragem já devesse ter lidado com isso)
-        df = df.dropna(subset=['PAM50Subtype'])
+        # REORDENAMENTO: códigos inteiros dos subtipos (0..3, na ordem de SUBTYPE_ORDER),
+        # calculados uma única vez com searchsorted (SUBTYPE_ORDER não está em ordem
+        # alfabética, por isso a busca usa o argsort como 'sorter')
+        subtype_names = np.array(SUBTYPE_ORDER)
+        sorter = np.argsort(subtype_names)
+        subtype_codes = sorter[np.searchsorted(subtype_names, df['PAM50Subtype'].to_numpy(), sorter=sorter)]
         print(f"Subtipos reordenados no gráfico: {SUBTYPE_ORDER}")
         
         # 3. Binarização da Expressão (Gene Expresso se valor > 0)
-        # Cria um novo DataFrame binário (0 ou 1)
-        df_expressed = df[GENES_OF_INTEREST].apply(lambda x: (x > 0).astype(int))
-        df_expressed['PAM50Subtype'] = df['PAM50Subtype']
+        # Cria um novo DataFrame binário (0 ou 1) com uma única comparação sobre a matriz (uint8)
+        df_expressed = pd.DataFrame(
+            (df[GENES_OF_INTEREST].to_numpy() > 0).astype(np.uint8),
+            index=df.index,
+            columns=GENES_OF_INTEREST
+        )
 
     except Exception as e:
         # Mensagens de erro atualizadas
@@ -117,103 +148,119 @@ def load_and_analyze_data():
         
     # 4. Cálculo de Contagens e Frequências
     
+    # Matriz binária pacientes x genes (os códigos dos subtipos já foram calculados acima)
+    expr = df_expressed.to_numpy()
+    n_subtypes = len(SUBTYPE_ORDER)
+
     # A. Contagem absoluta de pacientes em cada subtipo (para normalização)
-    # O groupby agora usará a ordem categórica definida
-    total_patients_per_subtype = df_expressed.groupby('PAM50Subtype').size()
+    total_patients_per_subtype = np.bincount(subtype_codes, minlength=n_subtypes)
     
-    # B. Contagem absoluta de pacientes que expressam cada gene, por subtipo
-    df_absolute_counts = df_expressed.groupby('PAM50Subtype')[GENES_OF_INTEREST].sum()
+    # B. Contagem absoluta de pacientes que expressam cada gene, por subtipo (matriz subtipos x genes)
+    if njit is not None:
+        absolute_counts = count_expressed_by_subtype(expr, subtype_codes, n_subtypes)
+    else:
+        absolute_counts = np.zeros((n_subtypes, len(GENES_OF_INTEREST)), dtype=np.int64)
+        np.add.at(absolute_counts, subtype_codes, expr)
 
     # C. Cálculo da Frequência Média (Porcentagem) - Base do novo eixo Y
-    df_percentage = df_absolute_counts.div(total_patients_per_subtype, axis=0) * 100
+    # (subtipos sem pacientes ficam com 0% em vez de NaN)
+    totals = total_patients_per_subtype[:, None]
+    percentage = np.divide(absolute_counts * 100.0, totals, out=np.zeros(absolute_counts.shape), where=totals > 0)
     
     # 5. Plotagem do Gráfico de Barras Empilhadas
     fig, ax = plt.subplots(figsize=(12, 8))
-
-    # Cores e ponto de início para o empilhamento
+    try:
+        # Cores e ponto de início para o empilhamento
     
-    # Reverte para acumular a Porcentagem para o empilhamento (bottoms)
-    bottoms = pd.Series([0.0] * len(df_percentage.index), index=df_percentage.index)
-
-    # Plotar cada gene como uma "camada"
-    for i, gene in enumerate(GENES_OF_INTEREST):
-        # Valores de altura: Porcentagem (Eixo Y)
-        heights = df_percentage[gene] 
-        # Contagem Absoluta (para rótulo)
-        absolute_count = df_absolute_counts[gene]
+        # Reverte para acumular a Porcentagem para o empilhamento (bottoms)
+        bottoms = np.zeros(n_subtypes)
+
+        # Plotar cada gene como uma "camada"
+        for i, gene in enumerate(GENES_OF_INTEREST):
+            # Valores de altura: Porcentagem (Eixo Y)
+            heights = percentage[:, i]
+            # Contagem Absoluta (para rótulo)
+            absolute_count = absolute_counts[:, i]
         
-        # Cria a barra empilhada (usando a Porcentagem como altura)
-        bars = ax.bar(
-            df_percentage.index, # Eixo X: Subtipos PAM50
-            heights, # Altura: Frequência Média (%)
-            bottom=bottoms, # Ponto de início (Porcentagem)
-            label=gene, # Legenda (o gene individual)
-            color=GENE_COLORS[i], # Usa a cor definida na lista personalizada
-            edgecolor='black'
-        )
+            # Cria a barra empilhada (usando a Porcentagem como altura)
+            bars = ax.bar(
+                SUBTYPE_ORDER, # Eixo X: Subtipos PAM50
+                heights, # Altura: Frequência Média (%)
+                bottom=bottoms, # Ponto de início (Porcentagem)
+                label=gene, # Legenda (o gene individual)
+                color=GENE_COLORS[i], # Usa a cor definida na lista personalizada
+                edgecolor='black'
+            )
         
-        # Adicionar os rótulos de contagem (absoluta) e porcentagem na barra
-        for bar, absolute_count_val, percentage_val in zip(bars, absolute_count, heights):
-            # Encontra o subtipo correspondente. 
-            x_labels = df_percentage.index
-            
-            # Calcula o índice da barra
-            bar_index = list(ax.get_xticks()).index(bar.get_x() + bar.get_width()/2)
-            subtype = x_labels[bar_index]
+            # Posição X (centro de cada barra), lida uma única vez por camada fora do laço de rótulos
+            centers_x = np.fromiter((bar.get_x() + bar.get_width() / 2 for bar in bars), dtype=float, count=n_subtypes)
 
-            # A posição Y para o texto é o ponto médio da barra
-            yval = bottoms.loc[subtype] + bar.get_height() / 2
+            # Adicionar os rótulos de contagem (absoluta) e porcentagem na barra
+            # As barras seguem a ordem de SUBTYPE_ORDER, então o índice j é o próprio subtipo
+            for j in range(n_subtypes):
+                absolute_count_val = absolute_count[j]
+                percentage_val = heights[j]
+
+                # A posição Y para o texto é o ponto médio da barra
+                yval = bottoms[j] + percentage_val / 2
             
-            # Formatar o texto: Contagem Absoluta (Porcentagem%)
-            label_text = f'{int(absolute_count_val)}\n({percentage_val:.1f}%)'
+                # Formatar o texto: Contagem Absoluta (Porcentagem%)
+                label_text = f'{int(absolute_count_val)}\n({percentage_val:.1f}%)'
             
-            # Apenas adicionar o rótulo se a barra for alta o suficiente (ex: > 3% para clareza)
-            if bar.get_height() > 3: 
-                # Determina a cor do texto com base na cor da barra
-                current_color = GENE_COLORS[i]
-                # Usa texto branco nas cores mais escuras (Roxo e Azul)
-                text_color = 'white' if current_color in DARK_COLORS else 'black'
+                # Apenas adicionar o rótulo se a barra for alta o suficiente (ex: > 3% para clareza)
+                if percentage_val > 3: 
+                    # Determina a cor do texto com base na cor da barra
+                    current_color = GENE_COLORS[i]
+                    # Usa texto branco nas cores mais escuras (Roxo e Azul)
+                    text_color = 'white' if current_color in DARK_COLORS else 'black'
                 
-                ax.text(
-                    bar.get_x() + bar.get_width() / 2,
-                    yval,
-                    label_text,
-                    ha='center',
-                    va='center',
-                    color=text_color, 
-                    # AUMENTA A FONTE DOS RÓTULOS INTERNOS
-                    fontsize=11, 
-                    fontweight='bold'
-                )
+                    ax.text(
+                        centers_x[j],
+                        yval,
+                        label_text,
+                        ha='center',
+                        va='center',
+                        color=text_color, 
+                        # AUMENTA A FONTE DOS RÓTULOS INTERNOS
+                        fontsize=11, 
+                        fontweight='bold'
+                    )
                 
-        # Atualiza o ponto de início (bottom) para a próxima barra empilhada
-        bottoms += heights
+            # Atualiza o ponto de início (bottom) para a próxima barra empilhada
+            bottoms += heights
 
-    # 5. Finalização do Gráfico
-    genes_str = ', '.join(GENES_OF_INTEREST)
+        # 5. Finalização do Gráfico
+        genes_str = ', '.join(GENES_OF_INTEREST)
     
-    # O limite Y total é baseado na soma máxima das frequências
-    y_max = bottoms.max() * 1.05
+        # O limite Y total é baseado na soma máxima das frequências
+        y_max = bottoms.max() * 1.05
     
-    ax.set_title(f'Frequência de Expressão Individual dos Genes de Eosinófilos ({genes_str}) por Subtipo PAM50 (Excluído: Normal)', fontsize=14, pad=20)
-    # AUMENTA A FONTE DO TÍTULO DO EIXO X
-    ax.set_xlabel('Subtipo PAM50', fontsize=14) 
+        ax.set_title(f'Frequência de Expressão Individual dos Genes de Eosinófilos ({genes_str}) por Subtipo PAM50 (Excluído: Normal)', fontsize=14, pad=20)
+        # AUMENTA A FONTE DO TÍTULO DO EIXO X
+        ax.set_xlabel('Subtipo PAM50', fontsize=14) 
     
-    # AUMENTA A FONTE DOS NOMES DOS SUBTIPOS (TICK LABELS)
-    ax.tick_params(axis='x', labelsize=12)
+        # AUMENTA A FONTE DOS NOMES DOS SUBTIPOS (TICK LABELS)
+        ax.tick_params(axis='x', labelsize=12)
     
-    # Reverte para o rótulo de Frequência
-    ax.set_ylabel('Frequência de Expressão (%)', fontsize=12) 
+        # Reverte para o rótulo de Frequência
+        ax.set_ylabel('Frequência de Expressão (%)', fontsize=12) 
     
-    # Define o intervalo dos ticks com base no valor máximo (incrementos de 10%)
-    ax.set_yticks(range(0, int(y_max) + 10, 10))
-    ax.set_ylim(0, y_max)
+        # Define o intervalo dos ticks com base no valor máximo (incrementos de 10%)
+        ax.set_yticks(range(0, int(y_max) + 10, 10))
+        ax.set_ylim(0, y_max)
 
-    # Configuração da legenda
-    ax.legend(title='Gene Individual Expresso', bbox_to_anchor=(1.05, 1), loc='upper left')
+        # Configuração da legenda
+        ax.legend(title='Gene Individual Expresso', bbox_to_anchor=(1.05, 1), loc='upper left')
 
-    plt.tight_layout(rect=[0, 0, 0.85, 1])
-    plt.show()
+        plt.tight_layout(rect=[0, 0, 0.85, 1])
+        if save_path:
+            fig.savefig(save_path, dpi=300)
+            print(f"Gráfico salvo em: {save_path}")
+        else:
+            plt.show()
+    finally:
+        # Libera a figura (e seus buffers de pixels) depois de exibida/salva
+        plt.close(fig)
 
     print("\nAnálise concluída. O gráfico de barras empilhadas para os genes de eosinófilos foi gerado e exibido.")
     print("O subtipo 'Normal' foi excluído da análise e do gráfico.")
@@ -225,7 +272,15 @@ def load_and_analyze_data():
 # Executa a função principal
 if __name__ == '__main__':
     # Adiciona um try/except para capturar exceções do tkinter se a interface não estiver disponível
+    # O arquivo Excel pode ser passado na linha de comando; sem ele, a caixa de diálogo é aberta
+    parser = argparse.ArgumentParser(description="Frequência de expressão dos genes por subtipo PAM50.")
+    parser.add_argument('--excel', help="Arquivo Excel de Dados de Pacientes (aba 'Dados_PAM50')")
+    parser.add_argument('--salvar', help="Salva o gráfico neste arquivo (ex: grafico.png) em vez de exibi-lo")
+    args = parser.parse_args()
+    if args.salvar:
+        # Execução em lote: backend sem interface gráfica
+        matplotlib.use('Agg')
     try:
-        load_and_analyze_data()
+        load_and_analyze_data(args.excel, args.salvar)
     except Exception as e:
         print(f"\nOcorreu um erro na execução da função principal: {e}")
\ No newline at end of file
@@ -0,0 +1,24 @@
+# Executa as análises de sobrevida dos genes de presença (CLC) e de recrutamento (CCL24)
+# com uma única seleção e leitura do arquivo de dados
+
+from survival_common import load_survival_data, run
+from survival_presence_CLC import GENE_GROUPS as GENE_GROUPS_CLC
+from survival_recruit_CCL24 import GENE_GROUPS as GENE_GROUPS_CCL24
+
+def main():
+    print("Iniciando as análises de sobrevida (CLC e CCL24)...")
+    
+    # Lê de uma vez as colunas de sobrevida e os genes dos dois scripts
+    df = load_survival_data(GENE_GROUPS_CLC + GENE_GROUPS_CCL24)
+    
+    print("\n=== Genes de presença: CLC, EPX, IL5RA, PRG2 ===")
+    run(GENE_GROUPS_CLC, df)
+    
+    print("\n=== Genes de recrutamento: CCL11, CCL24, CCL26 ===")
+    run(GENE_GROUPS_CCL24, df)
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as e:
+        print(f"Ocorreu um erro no programa principal: {e}")
\ No newline at end of file
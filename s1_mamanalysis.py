@@ -1,23 +1,52 @@
 # Script: Processamento de Dados Brutos (Versão com Tkinter)
 
 import pandas as pd
+import numpy as np
 import os
-from tkinter import Tk, filedialog # Importar o necessário do Tkinter
+import argparse
+from io_utils import select_file, read_csv_columns # Seleção de arquivos com Tkinter e leitura só das colunas usadas
 
-# --- 0. Configurar o Tkinter e Obter informações do usuário ---
+# Leitor PyArrow (multithread, colunar) quando disponível; caso contrário, o motor C padrão do pandas
+try:
+    import pyarrow
+    MOTOR_CSV = 'pyarrow'
+except ImportError:
+    MOTOR_CSV = 'c'
+
+# Dask (opcional): lê a matriz de RNAseq fora da memória, materializando só as amostras usadas
+try:
+    import dask.dataframe as dd
+except ImportError:
+    dd = None
+
+# --- 0. Obter informações do usuário (linha de comando ou Tkinter) ---
 
-# Esconder a janela raiz do Tkinter
-Tk().withdraw() 
+# Os caminhos podem ser passados na linha de comando (execução em lote, sem interface gráfica).
+# Os que não forem informados são pedidos pelas caixas de diálogo do Tkinter, como antes.
+parser = argparse.ArgumentParser(description="Junta RNAseq, Clinical e Phenotypes em um único arquivo CSV.")
+parser.add_argument('--rnaseq', help="Arquivo de RNAseq (.gz)")
+parser.add_argument('--clinical', help="Arquivo Clinical (.txt, .tsv, etc.)")
+parser.add_argument('--phenotypes', help="Arquivo Phenotypes/Survival (.txt, .tsv, etc.)")
+parser.add_argument('--banco', help="Nome do banco de dados, usado para a pasta de saída (ex: TCGA-BRCA)")
+args = parser.parse_args()
 
-print("Abrindo caixas de diálogo para seleção de arquivos...")
+arquivo_rnaseq = args.rnaseq
+arquivo_clinical = args.clinical
+arquivo_phenotypes = args.phenotypes
 
-# Pedir os nomes dos arquivos usando o seletor de arquivos gráfico
-print("Selecione o arquivo de RNAseq (.gz)")
-arquivo_rnaseq = filedialog.askopenfilename(title="Selecione o arquivo de RNAseq (.gz)")
-print("Selecione o arquivo Clinical")
-arquivo_clinical = filedialog.askopenfilename(title="Selecione o arquivo Clinical (.txt, .tsv, etc.)")
-print("Selecione o arquivo Phenotypes/Survival")
-arquivo_phenotypes = filedialog.askopenfilename(title="Selecione o arquivo Phenotypes/Survival (.txt, .tsv, etc.)")
+if not all([arquivo_rnaseq, arquivo_clinical, arquivo_phenotypes]):
+    print("Abrindo caixas de diálogo para seleção de arquivos...")
+
+    # Pedir os nomes dos arquivos usando o seletor de arquivos gráfico
+    if not arquivo_rnaseq:
+        print("Selecione o arquivo de RNAseq (.gz)")
+        arquivo_rnaseq = select_file(title="Selecione o arquivo de RNAseq (.gz)")
+    if not arquivo_clinical:
+        print("Selecione o arquivo Clinical")
+        arquivo_clinical = select_file(title="Selecione o arquivo Clinical (.txt, .tsv, etc.)")
+    if not arquivo_phenotypes:
+        print("Selecione o arquivo Phenotypes/Survival")
+        arquivo_phenotypes = select_file(title="Selecione o arquivo Phenotypes/Survival (.txt, .tsv, etc.)")
 
 # Verificar se o usuário cancelou alguma seleção
 if not all([arquivo_rnaseq, arquivo_clinical, arquivo_phenotypes]):
@@ -28,8 +57,8 @@ print(f"Arquivo RNAseq selecionado: {arquivo_rnaseq}")
 print(f"Arquivo Clinical selecionado: {arquivo_clinical}")
 print(f"Arquivo Phenotypes selecionado: {arquivo_phenotypes}")
 
-# Pedir o nome do banco de dados para criar a pasta (ainda via console)
-nome_banco_dados = input("\nDigite o nome do banco de dados (ex: TCGA-BRCA): ")
+# Nome do banco de dados para criar a pasta (argumento --banco ou via console)
+nome_banco_dados = args.banco or input("\nDigite o nome do banco de dados (ex: TCGA-BRCA): ")
 
 if not nome_banco_dados:
     print("Nome do banco de dados não fornecido. Encerrando.")
@@ -49,24 +78,51 @@ except OSError as error:
 
 print("\nCarregando arquivos...")
 try:
-    # Carregar dados de expressão (RNAseq)
-    df_expr = pd.read_csv(arquivo_rnaseq, 
-                            sep='\t', 
-                            index_col=0)
-    print(f"Arquivo RNAseq carregado.")
+    # Os arquivos clínicos (pequenos) são lidos primeiro, para saber quais amostras
+    # da matriz de expressão serão realmente usadas na junção.
 
     # Carregar dados clínicos
     df_pheno = pd.read_csv(arquivo_clinical, 
                              sep='\t', 
-                             index_col=0)
+                             index_col=0,
+                             engine=MOTOR_CSV)
     print(f"Arquivo Clinical carregado.")
 
     # Carregar dados de fenótipo/sobrevida
     df_surv = pd.read_csv(arquivo_phenotypes, 
                           sep='\t', 
-                          index_col=0)
+                          index_col=0,
+                          engine=MOTOR_CSV)
     print(f"Arquivo Phenotypes carregado.")
 
+    # Carregar dados de expressão (RNAseq)
+    # Valores de expressão (log2) não precisam de 64 bits: float32 reduz pela metade a memória.
+    # O cabeçalho é lido antes para aplicar o tipo apenas às colunas de amostras (não à de genes).
+    colunas_rnaseq = pd.read_csv(arquivo_rnaseq, sep='\t', nrows=0).columns
+    tipos_rnaseq = {coluna: np.float32 for coluna in colunas_rnaseq[1:]}
+
+    if dd is not None:
+        # Leitura preguiçosa: aqui só o cabeçalho é lido; as partições são processadas
+        # em paralelo na etapa 2, apenas para as colunas (amostras) em comum.
+        # Arquivos .gz não podem ser divididos em blocos, então viram uma única partição.
+        tamanho_bloco = None if arquivo_rnaseq.endswith('.gz') else '128MB'
+        ddf_expr = dd.read_csv(arquivo_rnaseq, sep='\t', blocksize=tamanho_bloco, dtype=tipos_rnaseq)
+    else:
+        # Só as colunas de amostras presentes nos dois arquivos clínicos são lidas
+        # (a junção da etapa 2 é 'inner', as demais seriam descartadas de qualquer forma)
+        amostras_clinicas = df_pheno.index.intersection(df_surv.index)
+        if MOTOR_CSV == 'pyarrow':
+            # (arquivos .gz são descompactados pelo próprio pandas antes de passar ao PyArrow;
+            # o motor PyArrow não aceita chunksize, mas já lê as colunas em paralelo)
+            df_expr = read_csv_columns(arquivo_rnaseq, amostras_clinicas, MOTOR_CSV,
+                                       sep='\t', dtype=tipos_rnaseq)
+        else:
+            # Leitura em blocos de linhas (genes), limitando a memória usada pelo parser
+            blocos = read_csv_columns(arquivo_rnaseq, amostras_clinicas, MOTOR_CSV,
+                                      sep='\t', dtype=tipos_rnaseq, chunksize=500)
+            df_expr = pd.concat(blocos)
+    print(f"Arquivo RNAseq carregado.")
+
 except FileNotFoundError as e:
     print(f"\nErro: Arquivo não encontrado.")
     print(f"Detalhe: {e}")
@@ -81,9 +137,6 @@ except Exception as e:
 
 print("\nProcessando e juntando os dados...")
 
-# Transpor a matriz de expressão para que as amostras fiquem nas linhas
-df_expr_T = df_expr.T
-
 # Antes de juntar, removemos a coluna '_PATIENT' duplicada do df_surv, se ela existir.
 # Vamos manter a coluna '_PATIENT' que já existe no df_pheno (que é o índice).
 df_surv_cleaned = df_surv.copy()
@@ -94,6 +147,19 @@ if '_PATIENT' in df_surv_cleaned.columns:
 # Agora, junte o df_pheno (clinical) com o df_surv_cleaned (phenotypes)
 df_clinical_full = df_pheno.join(df_surv_cleaned, how='inner')
 
+# Seleciona apenas as amostras com dados clínicos antes de transpor a matriz de expressão,
+# evitando uma cópia transposta da matriz inteira (genes x todas as amostras)
+if dd is not None:
+    # Com Dask, só as colunas das amostras em comum são lidas e materializadas
+    coluna_genes = ddf_expr.columns[0]
+    amostras_comuns = df_clinical_full.index.intersection(ddf_expr.columns[1:])
+    df_expr = ddf_expr[[coluna_genes, *amostras_comuns]].compute().set_index(coluna_genes)
+else:
+    amostras_comuns = df_clinical_full.index.intersection(df_expr.columns)
+
+# Transpor a matriz de expressão para que as amostras fiquem nas linhas
+df_expr_T = df_expr.loc[:, amostras_comuns].T
+
 # Juntar os dados clínicos completos com os dados de expressão
 df_merged = df_clinical_full.join(df_expr_T, how='inner')
 
@@ -116,6 +182,8 @@ print(f"\nFormato do DataFrame final: {df_merged.shape}")
 # Salvar o DataFrame combinado no caminho especificado
 try:
     print(f"Salvando dados combinados em '{caminho_saida}'...")
+    # Sempre pelo to_csv (com ou sem PyArrow): o cabeçalho do índice, as aspas e o formato dos
+    # números do arquivo lido pelos scripts seguintes não dependem das bibliotecas instaladas
     df_merged.to_csv(caminho_saida)
     print("Arquivo salvo com sucesso!")
 except Exception as e:
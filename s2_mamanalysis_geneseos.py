@@ -1,12 +1,37 @@
 # Script 2: Análise Detalhada de Genes (PAM50, Sobrevida, Combinações)
 
 import pandas as pd
+import numpy as np
 import os
-import itertools
 from tkinter import Tk, filedialog
-from scipy.stats import kruskal, chi2_contingency
+from scipy.stats import kruskal, norm, chi2_contingency
 from lifelines import CoxPHFitter
 import warnings
+from io_utils import read_csv_columns # Leitura só das colunas usadas
+
+# Leitor PyArrow (multithread, colunar) quando disponível; caso contrário, o motor C padrão do pandas
+try:
+    import pyarrow
+    MOTOR_CSV = 'pyarrow'
+except ImportError:
+    MOTOR_CSV = 'c'
+
+# XlsxWriter (somente escrita, bem mais rápido) quando disponível; caso contrário, openpyxl
+try:
+    import xlsxwriter
+    MOTOR_EXCEL = 'xlsxwriter'
+except ImportError:
+    from openpyxl.styles import Font
+    from openpyxl.utils import get_column_letter
+    MOTOR_EXCEL = 'openpyxl'
+
+# Polars (opcional): escreve as tabelas de dados direto no workbook do XlsxWriter, por coluna,
+# sem passar pelo to_excel do pandas célula a célula (a conversão do pandas usa o PyArrow)
+try:
+    import polars as pl
+    ESCRITA_POLARS = MOTOR_EXCEL == 'xlsxwriter' and MOTOR_CSV == 'pyarrow'
+except ImportError:
+    ESCRITA_POLARS = False
 
 # --- Configurações Iniciais ---
 print("Iniciando a análise detalhada...")
@@ -40,9 +65,24 @@ caminho_pasta = os.path.dirname(arquivo_csv_path)
 nome_saida_excel = f"Analise_Genes_{pd.Timestamp.now().strftime('%Y%m%d_%H%M')}.xlsx"
 caminho_saida_excel = os.path.join(caminho_pasta, nome_saida_excel)
 
+# Estes são os nomes oficiais (HUGO) dos genes de interesse
+# PRG2  -> MBP (Major Basic Protein)
+# EPX   -> EPO (Eosinophil Peroxidase)
+# CLC -> Gal10 (Galectin-10)
+# IL5RA -> IL5R1 (IL-5 Receptor alpha)
+genes_of_interest = ['PRG2', 'EPX', 'CLC', 'IL5RA']
+
+# Definição das colunas de análise
+col_pam50 = 'PAM50Call_RNAseq'
+col_tempo = 'OS_Time_nature2012'
+col_evento = 'OS_event_nature2012'
+
 print(f"Carregando {nome_arquivo}...")
 try:
-    df_merged = pd.read_csv(arquivo_csv_path, index_col=0)
+    # Só as colunas usadas na análise são lidas (o arquivo do Script 1 tem milhares de colunas de genes).
+    # As ausentes no arquivo são ignoradas aqui e informadas nas verificações abaixo.
+    colunas_analise = genes_of_interest + [col_pam50, col_tempo, col_evento]
+    df_merged = read_csv_columns(arquivo_csv_path, colunas_analise, MOTOR_CSV)
 except FileNotFoundError:
     print(f"ERRO: O arquivo '{arquivo_csv_path}' não foi encontrado.")
     exit()
@@ -54,12 +94,6 @@ print(f"Dados carregados com sucesso. Temos {df_merged.shape[0]} amostras e {df_
 
 # --- 1. Preparação dos Dados e Definição de Grupos ---
 
-# Estes são os nomes oficiais (HUGO) dos genes de interesse
-# PRG2  -> MBP (Major Basic Protein)
-# EPX   -> EPO (Eosinophil Peroxidase)
-# CLC -> Gal10 (Galectin-10)
-# IL5RA -> IL5R1 (IL-5 Receptor alpha)
-genes_of_interest = ['PRG2', 'EPX', 'CLC', 'IL5RA']
 genes_presentes = [gene for gene in genes_of_interest if gene in df_merged.columns]
 genes_ausentes = [gene for gene in genes_of_interest if gene not in df_merged.columns]
 
@@ -71,11 +105,6 @@ if not genes_presentes:
 
 print(f"Analisando os genes: {genes_presentes}")
 
-# Definição das colunas de análise
-col_pam50 = 'PAM50Call_RNAseq'
-col_tempo = 'OS_Time_nature2012'
-col_evento = 'OS_event_nature2012'
-
 # Verificar se as colunas de análise existem
 colunas_necessarias = {col_pam50: "PAM50", col_tempo: "Sobrevida (Tempo)", col_evento: "Sobrevida (Evento)"}
 colunas_faltando = [col for col in colunas_necessarias if col not in df_merged.columns]
@@ -99,115 +128,193 @@ for gene in genes_presentes:
     df_merged[col_name] = (df_merged[gene] > 0)
     binary_cols.append(col_name)
 
-# Função para criar o nome do grupo de combinação
-def get_expression_group(row):
-    expressed_genes = []
-    for gene in genes_presentes:
-        if row[f"{gene}_expresso"]:
-            expressed_genes.append(gene)
-    
-    count = len(expressed_genes)
-    
-    if count == 0:
-        group_name = "Nenhum"
-    else:
-        # Ordena para garantir que CLC_IL5RA e IL5RA_CLC sejam o mesmo grupo
-        group_name = "_".join(sorted(expressed_genes))
-        
-    return pd.Series([count, group_name], index=['contagem_genes_expressos', 'grupo_expressao'])
+# Matriz binária pacientes x genes (1 = expresso)
+matriz_expresso = df_merged[binary_cols].to_numpy(dtype=np.uint8)
+
+# Número de genes expressos por paciente
+df_merged['contagem_genes_expressos'] = matriz_expresso.sum(axis=1)
 
-# Aplica a função para criar as colunas de grupo
-df_merged[['contagem_genes_expressos', 'grupo_expressao']] = df_merged.apply(get_expression_group, axis=1)
+# Cada combinação de genes expressos vira um código inteiro (bit i = gene i expresso)
+codigos_grupo = matriz_expresso @ (1 << np.arange(len(genes_presentes), dtype=np.int64))
+
+# Tabela com o nome do grupo de cada código: 0 -> 'Nenhum'; os demais com os genes em
+# ordem alfabética, para garantir que CLC_IL5RA e IL5RA_CLC sejam o mesmo grupo
+nomes_grupo = ["Nenhum"] + [
+    "_".join(sorted(gene for i, gene in enumerate(genes_presentes) if (codigo >> i) & 1))
+    for codigo in range(1, 2 ** len(genes_presentes))
+]
+df_merged['grupo_expressao'] = np.asarray(nomes_grupo, dtype=object)[codigos_grupo]
 
 print("Grupos de combinação definidos.")
 
 
 # --- 2. Preparação do Arquivo Excel ---
 print(f"Preparando o arquivo Excel de saída: '{caminho_saida_excel}'...")
-writer_excel = pd.ExcelWriter(caminho_saida_excel, engine='openpyxl')
+writer_excel = pd.ExcelWriter(caminho_saida_excel, engine=MOTOR_EXCEL)
 workbook = writer_excel.book
 
+# Define a largura de uma coluna (índice a partir de 0) conforme o motor de escrita
+def set_col_width(worksheet, col_idx, width):
+    if MOTOR_EXCEL == 'xlsxwriter':
+        worksheet.set_column(col_idx, col_idx, width)
+    else:
+        # (get_column_letter também funciona depois da coluna Z: AA, AB, ...)
+        worksheet.column_dimensions[get_column_letter(col_idx + 1)].width = width
+
+# Converte um valor para a escrita direta na planilha (tipos NumPy -> Python; ausentes -> vazio)
+def cell_value(value):
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    return value.item() if isinstance(value, np.generic) else value
+
+# Cria uma aba e escreve as linhas (tuplas) em ordem, em uma única passada. As larguras das
+# colunas são ajustadas ao maior texto de cada coluna, sem contar as linhas em skip_width_rows.
+def write_rows(sheet_name, rows, bold_rows=(), skip_width_rows=()):
+    if MOTOR_EXCEL == 'xlsxwriter':
+        worksheet = writer_excel.book.add_worksheet(sheet_name)
+        bold = writer_excel.book.add_format({'bold': True})
+        for r, row in enumerate(rows):
+            worksheet.write_row(r, 0, [cell_value(v) for v in row], bold if r in bold_rows else None)
+    else:
+        worksheet = writer_excel.book.create_sheet(sheet_name)
+        for r, row in enumerate(rows):
+            worksheet.append([cell_value(v) for v in row])
+            if r in bold_rows:
+                for cell in worksheet[r + 1]:
+                    cell.font = Font(bold=True)
+    widths = {}
+    for r, row in enumerate(rows):
+        if r in skip_width_rows:
+            continue
+        for c, v in enumerate(row):
+            widths[c] = max(widths.get(c, 0), len(str(v)))
+    for c, width in widths.items():
+        set_col_width(worksheet, c, width + 2)
+
 # Função auxiliar para escrever no Excel
 def write_to_excel(df, sheet_name, startrow=0, startcol=0, header=True, index=True):
+    if ESCRITA_POLARS:
+        # O índice vira a primeira coluna, como no to_excel; autofit ajusta as larguras
+        df_saida = df.rename_axis(df.index.name or '').reset_index() if index else df
+        df_saida = df_saida.set_axis([str(col) for col in df_saida.columns], axis=1)
+        pl.from_pandas(df_saida).write_excel(
+            workbook=writer_excel.book, worksheet=sheet_name, position=(startrow, startcol),
+            include_header=header, autofit=True, autofilter=False)
+        return
     # Função para ajustar a largura das colunas
     df.to_excel(writer_excel, sheet_name=sheet_name, startrow=startrow, startcol=startcol, header=header, index=index)
     worksheet = writer_excel.sheets[sheet_name]
-    for i, col in enumerate(df.columns if header else []):
-        col_width = max(len(str(col)), df[col].astype(str).str.len().max()) + 2
-        worksheet.column_dimensions[chr(65 + i + startcol + (1 if index else 0))].width = col_width
+    if header:
+        # Comprimento de todos os valores em uma única passada; largura = maior texto da coluna
+        # (incluindo o cabeçalho)
+        lengths = np.char.str_len(df.astype(str).to_numpy(dtype=str))
+        header_lengths = np.char.str_len(df.columns.astype(str).to_numpy(dtype=str))
+        col_widths = np.maximum(header_lengths, lengths.max(axis=0, initial=0)) + 2
+        for i, col_width in enumerate(col_widths):
+            set_col_width(worksheet, i + startcol + (1 if index else 0), int(col_width))
     if index:
-         idx_width = max(len(str(df.index.name)), df.index.astype(str).str.len().max()) + 2
-         worksheet.column_dimensions[chr(65 + startcol)].width = idx_width
+         idx_width = max(len(str(df.index.name)), np.char.str_len(df.index.astype(str).to_numpy(dtype=str)).max(initial=0)) + 2
+         set_col_width(worksheet, startcol, int(idx_width))
+
+# Tabela de contagens (absoluta e %) de uma coluna, a partir de uma única contagem.
+# A porcentagem é relativa ao total informado (por padrão, a soma das contagens).
+def count_table(series, index_name, total=None):
+    counts = series.value_counts()
+    scale = 100.0 / (counts.sum() if total is None else total)
+    table = pd.DataFrame({'Absoluto': counts, 'Porcentagem': (counts * scale).round(2)})
+    table.index.name = index_name
+    return table
+
+# Tabela de contingência (contagens) entre duas colunas, montada direto dos códigos
+# categóricos em uma única passada; pares com valor ausente são ignorados, como no crosstab
+def contingency_table(rows, cols):
+    valid = (rows.notna() & cols.notna()).to_numpy()
+    rows_cat = pd.Categorical(rows.to_numpy()[valid])
+    cols_cat = pd.Categorical(cols.to_numpy()[valid])
+    counts = np.zeros((len(rows_cat.categories), len(cols_cat.categories)), dtype=np.int64)
+    np.add.at(counts, (rows_cat.codes, cols_cat.codes), 1)
+    return pd.DataFrame(
+        counts,
+        index=pd.Index(rows_cat.categories, name=rows.name),
+        columns=pd.Index(cols_cat.categories, name=cols.name)
+    )
+
+# Máscaras de valores presentes (não ausentes), calculadas uma única vez por coluna e
+# combinadas para as abas de dados brutos e para a análise contínua
+colunas_mascara = [col for col in (col_pam50, col_tempo, col_evento) if col in df_merged.columns] + genes_presentes
+presente = {col: df_merged[col].notna().to_numpy() for col in colunas_mascara}
+genes_completos = np.logical_and.reduce([presente[gene] for gene in genes_presentes])
 
 # --- Aba: Dados_PAM50 (Raw) ---
 if col_pam50 in df_merged.columns:
     print("Escrevendo Aba: Dados_PAM50...")
-    df_pam50_raw = df_merged.dropna(subset=[col_pam50] + genes_presentes)
-    df_pam50_raw = df_pam50_raw[[col_pam50] + genes_presentes]
+    df_pam50_raw = df_merged.loc[presente[col_pam50] & genes_completos, [col_pam50] + genes_presentes]
     write_to_excel(df_pam50_raw, 'Dados_PAM50', index=True)
 
 # --- Aba: Dados_Sobrevida (Raw) ---
 if col_tempo in df_merged.columns and col_evento in df_merged.columns:
     print("Escrevendo Aba: Dados_Sobrevida...")
-    df_sobrevida_raw = df_merged.dropna(subset=[col_tempo, col_evento] + genes_presentes)
-    df_sobrevida_raw = df_sobrevida_raw[[col_tempo, col_evento] + genes_presentes]
+    df_sobrevida_raw = df_merged.loc[presente[col_tempo] & presente[col_evento] & genes_completos, [col_tempo, col_evento] + genes_presentes]
     write_to_excel(df_sobrevida_raw, 'Dados_Sobrevida', index=True)
 
 # --- Aba: Analise_Estatistica (Contagens) ---
 print("Escrevendo Aba: Analise_Estatistica (Contagens)...")
-# Esta aba é um relatório, vamos construir as tabelas uma por uma
-current_row = 0
+# Esta aba é um relatório: as linhas de todas as tabelas (títulos, cabeçalhos e valores) são
+# montadas em ordem e escritas de uma só vez no final, em vez de uma escrita por tabela
+report_rows = []        # uma tupla por linha; () é uma linha em branco
+report_headers = set()  # linhas de cabeçalho das tabelas (em negrito)
+report_titles = set()   # linhas de título de seção (não entram no cálculo da largura)
+
+def add_report_table(df, index=True, blank_after=2):
+    report_headers.add(len(report_rows))
+    if index:
+        report_rows.append((df.index.name, *df.columns))
+    else:
+        report_rows.append(tuple(df.columns))
+    report_rows.extend(df.itertuples(index=index, name=None))
+    report_rows.extend([()] * blank_after)
+
+def add_report_title(text):
+    report_titles.add(len(report_rows))
+    report_rows.append((text,))
 
 # 1. Totais da Amostra
 total_pacientes = len(df_merged)
 df_total = pd.DataFrame({'Total de Pacientes': [total_pacientes]})
-write_to_excel(df_total, 'Analise_Estatistica', startrow=current_row, index=False)
-current_row += 3
+add_report_table(df_total, index=False, blank_after=1)
 
 # 2. Contagem por PAM50
 if col_pam50 in df_merged.columns:
-    df_pam50_counts = df_merged[col_pam50].value_counts().to_frame('Absoluto')
-    df_pam50_counts['Porcentagem'] = (df_pam50_counts['Absoluto'] / df_pam50_counts['Absoluto'].sum() * 100).round(2)
-    df_pam50_counts.index.name = "PAM50 Subtipo"
-    write_to_excel(df_pam50_counts, 'Analise_Estatistica', startrow=current_row)
-    current_row += df_pam50_counts.shape[0] + 3
+    df_pam50_counts = count_table(df_merged[col_pam50], "PAM50 Subtipo")
+    add_report_table(df_pam50_counts)
 
 # 3. Contagem por Sobrevida (Evento)
 if col_evento in df_merged.columns:
-    df_surv_counts = df_merged[col_evento].map({0:'Vivo', 1:'Morto'}).value_counts().to_frame('Absoluto')
-    df_surv_counts['Porcentagem'] = (df_surv_counts['Absoluto'] / df_surv_counts['Absoluto'].sum() * 100).round(2)
-    df_surv_counts.index.name = "Status Sobrevida (Evento)"
-    write_to_excel(df_surv_counts, 'Analise_Estatistica', startrow=current_row)
-    current_row += df_surv_counts.shape[0] + 3
+    # Rótulo do status (0 = Vivo, 1 = Morto), calculado uma única vez e usado também no crosstab
+    # da seção 6; eventos ausentes ou com outro código ficam sem rótulo (NaN)
+    status_evento = df_merged[col_evento].map({0: 'Vivo', 1: 'Morto'})
+    df_surv_counts = count_table(status_evento, "Status Sobrevida (Evento)")
+    add_report_table(df_surv_counts)
 
 # 4. Contagem por Grupos de Expressão (Geral)
-df_group_counts = df_merged['grupo_expressao'].value_counts().to_frame('Absoluto')
-df_group_counts['Porcentagem'] = (df_group_counts['Absoluto'] / total_pacientes * 100).round(2)
-df_group_counts.index.name = "Grupo de Expressão (Geral)"
-write_to_excel(df_group_counts, 'Analise_Estatistica', startrow=current_row)
-current_row += df_group_counts.shape[0] + 3
+df_group_counts = count_table(df_merged['grupo_expressao'], "Grupo de Expressão (Geral)", total=total_pacientes)
+add_report_table(df_group_counts)
 
 # 5. Específico do PAM50 (Crosstab)
 if col_pam50 in df_merged.columns:
-    df_pam50_crosstab = pd.crosstab(df_merged['grupo_expressao'], df_merged[col_pam50])
-    df_pam50_crosstab_pct = df_pam50_crosstab.apply(lambda r: (r/r.sum() * 100).round(1), axis=0) # Porcentagem por subtipo
+    df_pam50_crosstab = contingency_table(df_merged['grupo_expressao'], df_merged[col_pam50])
+    df_pam50_crosstab_pct = (df_pam50_crosstab / df_pam50_crosstab.sum(axis=0) * 100).round(1) # Porcentagem por subtipo
     
     # Escreve o cabeçalho para esta seção
-    pd.DataFrame(["Específico PAM50: Contagem Absoluta por Grupo de Expressão"]).to_excel(
-        writer_excel, sheet_name='Analise_Estatistica', startrow=current_row, index=False, header=False)
-    current_row += 1
-    write_to_excel(df_pam50_crosstab, 'Analise_Estatistica', startrow=current_row)
-    current_row += df_pam50_crosstab.shape[0] + 2
-
-    pd.DataFrame(["Específico PAM50: Porcentagem por Subtipo (%)"]).to_excel(
-        writer_excel, sheet_name='Analise_Estatistica', startrow=current_row, index=False, header=False)
-    current_row += 1
-    write_to_excel(df_pam50_crosstab_pct, 'Analise_Estatistica', startrow=current_row)
-    current_row += df_pam50_crosstab_pct.shape[0] + 3
+    add_report_title("Específico PAM50: Contagem Absoluta por Grupo de Expressão")
+    add_report_table(df_pam50_crosstab, blank_after=1)
+
+    add_report_title("Específico PAM50: Porcentagem por Subtipo (%)")
+    add_report_table(df_pam50_crosstab_pct)
 
 # 6. Específico da Sobrevida (Crosstab)
 if col_evento in df_merged.columns:
-    df_surv_crosstab = pd.crosstab(df_merged['grupo_expressao'], df_merged[col_evento].map({0:'Vivo', 1:'Morto'}))
+    df_surv_crosstab = contingency_table(df_merged['grupo_expressao'], status_evento)
     
     # Teste Chi-Square
     try:
@@ -216,63 +323,89 @@ if col_evento in df_merged.columns:
     except ValueError:
         p_value_text = "Teste Chi-Square falhou (provavelmente poucos dados)."
         
-    pd.DataFrame(["Específico Sobrevida: Contagem Absoluta por Grupo de Expressão"]).to_excel(
-        writer_excel, sheet_name='Analise_Estatistica', startrow=current_row, index=False, header=False)
-    current_row += 1
-    write_to_excel(df_surv_crosstab, 'Analise_Estatistica', startrow=current_row)
-    current_row += df_surv_crosstab.shape[0] + 2
+    add_report_title("Específico Sobrevida: Contagem Absoluta por Grupo de Expressão")
+    add_report_table(df_surv_crosstab, blank_after=1)
     
-    pd.DataFrame([p_value_text]).to_excel(
-        writer_excel, sheet_name='Analise_Estatistica', startrow=current_row, index=False, header=False)
-    current_row += 3
+    add_report_title(p_value_text)
+
+write_rows('Analise_Estatistica', report_rows, bold_rows=report_headers, skip_width_rows=report_titles)
 
 # --- Aba: Correlacao_Continua (Nível de Expressão) ---
 print("Escrevendo Aba: Correlacao_Continua (Nível de Expressão)...")
 # Responde: "dentro dos que expressam CLC e IL5ra, quanto maior a expressão..."
 
-results_continua = []
+# Resultados acumulados coluna a coluna (uma lista por coluna da aba)
+res_grupo, res_gene, res_p, res_hr, res_ci = [], [], [], [], []
+
+# Um único ajustador de Cox (sem penalização), reaproveitado em todos os ajustes (grupo, gene)
+cph = CoxPHFitter(penalizer=0.0)
+
+# As colunas de sobrevida são as mesmas para todos os grupos e genes
+tem_sobrevida = col_tempo in df_merged.columns and col_evento in df_merged.columns
+expressos = (df_merged['contagem_genes_expressos'] > 0).to_numpy()
 
-# Iterar por cada grupo de expressão (exceto 'Nenhum')
-for group_name, group_df in df_merged[df_merged['contagem_genes_expressos'] > 0].groupby('grupo_expressao'):
+if tem_sobrevida:
+    # Amostras com algum gene expresso e com tempo/evento presentes (máscaras já calculadas),
+    # convertidas para float64 uma única vez (evita conversões dentro do lifelines)
+    mascara_cox = expressos & presente[col_tempo] & presente[col_evento]
+    dados_cox = df_merged.loc[mascara_cox, [col_tempo, col_evento] + genes_presentes].astype(np.float64)
+    grupos_cox = df_merged['grupo_expressao'].to_numpy()[mascara_cox]
+
+# Iterar por cada grupo de expressão (exceto 'Nenhum'), em ordem alfabética
+for group_name in sorted(df_merged.loc[expressos, 'grupo_expressao'].unique()):
     
     genes_no_grupo = group_name.split('_')
     
+    if tem_sobrevida:
+        # Linhas do grupo, só com as colunas dos seus genes
+        base_cox = dados_cox.loc[grupos_cox == group_name, [col_tempo, col_evento] + genes_no_grupo]
+    
     for gene in genes_no_grupo:
         
         # 1. Relação com PAM50 (Kruskal-Wallis) - REMOVIDO
         
         # 2. Relação com Sobrevida (Cox Proportional Hazards)
-        if col_tempo in group_df.columns and col_evento in group_df.columns:
-            df_cox = group_df[[col_tempo, col_evento, gene]].dropna()
+        if tem_sobrevida:
+            # Para cada gene, só falta remover as amostras sem valor de expressão
+            df_cox = base_cox.loc[base_cox[gene].notna(), [col_tempo, col_evento, gene]]
             if df_cox.shape[0] > 10 and df_cox[col_evento].sum() > 1: # Mínimo de dados
                 try:
-                    cph = CoxPHFitter()
-                    cph.fit(df_cox, duration_col=col_tempo, event_col=col_evento, formula=gene)
-                    summary = cph.summary
-                    p_val_cox = summary.loc[gene, 'p']
-                    hr = summary.loc[gene, 'exp(coef)']
-                    ci = f"[{summary.loc[gene, 'exp(coef) lower 95%']:.2f}-{summary.loc[gene, 'exp(coef) upper 95%']:.2f}]"
+                    # Sem 'formula': a única covariável é a coluna do gene, então a matriz de
+                    # desenho é a própria coluna (evita montar a fórmula a cada ajuste)
+                    cph.fit(df_cox, duration_col=col_tempo, event_col=col_evento)
+                    # Valores lidos direto dos atributos ajustados, sem montar o cph.summary completo
+                    # (p-valor de Wald bicaudal, o mesmo do lifelines: P(qui² com 1 g.l. > z²) = 2·P(N > |z|))
+                    z = cph.params_[gene] / cph.standard_errors_[gene]
+                    p_val_cox = 2 * norm.sf(abs(z))
+                    hr = cph.hazard_ratios_[gene]
+                    ci_inf, ci_sup = np.exp(cph.confidence_intervals_.loc[gene].to_numpy())
+                    ci = f"[{ci_inf:.2f}-{ci_sup:.2f}]"
                 except Exception as e:
-                    p_val_cox = pd.NA
-                    hr = pd.NA
+                    p_val_cox = np.nan
+                    hr = np.nan
                     ci = str(e) # Registrar o erro
             else:
-                p_val_cox = pd.NA
-                hr = pd.NA
+                p_val_cox = np.nan
+                hr = np.nan
                 ci = "Dados insuficientes"
 
-            results_continua.append({
-                'Grupo Expressão': group_name,
-                'Gene Analisado': gene,
-                'Teste': 'Nível Expressão vs Sobrevida',
-                'Estatística': 'Cox PH P-Value',
-                'Valor': p_val_cox,
-                'Hazard Ratio (HR)': hr,
-                'HR (IC 95%)': ci
-            })
-
-if results_continua:
-    df_results_continua = pd.DataFrame(results_continua)
+            res_grupo.append(group_name)
+            res_gene.append(gene)
+            res_p.append(p_val_cox)
+            res_hr.append(hr)
+            res_ci.append(ci)
+
+if res_grupo:
+    # Construção coluna a coluna; P-valor e HR como float64 (NaN quando não calculados)
+    df_results_continua = pd.DataFrame({
+        'Grupo Expressão': res_grupo,
+        'Gene Analisado': res_gene,
+        'Teste': 'Nível Expressão vs Sobrevida',
+        'Estatística': 'Cox PH P-Value',
+        'Valor': np.array(res_p, dtype=np.float64),
+        'Hazard Ratio (HR)': np.array(res_hr, dtype=np.float64),
+        'HR (IC 95%)': res_ci
+    })
     write_to_excel(df_results_continua, 'Correlacao_Continua', index=False)
 else:
     pd.DataFrame(["Nenhuma análise contínua foi executada."]).to_excel(
@@ -1,14 +1,18 @@
 import pandas as pd
 import os
+from concurrent.futures import ProcessPoolExecutor
 import tkinter as tk
 from tkinter import filedialog
+import matplotlib
+# Os gráficos só são salvos em PNG (nunca exibidos): backend Agg, sem criar janelas/canvas de interface
+matplotlib.use('Agg')
 import matplotlib.pyplot as plt
 import seaborn as sns
 from lifelines import KaplanMeierFitter
-from lifelines.statistics import logrank_test, multivariate_logrank_test
+from lifelines.statistics import multivariate_logrank_test
 from scipy.stats import chi2_contingency
 import numpy as np
-
+from survival_common import load_expression_csv, two_group_labels # Leitura do CSV do Script 1 e rótulos dos grupos
 
 # --- Constantes ---
 # NOVO GRUPO DE GENES: IL5, IL33, IL25, TSLP
@@ -41,111 +45,77 @@ def definir_grupos_comparacao(df):
     """
     print("Definindo grupos de comparação...")
     
-    # 1. Criar colunas booleanas para expressão (> 0)
-    for gene in GENES_INTERESSE:
-        if gene in df.columns:
-            # Garante que a coluna de expressão seja booleana (True/False)
-            df[f'{gene}_expresso'] = df[gene] > 0
-        else:
-            # Para a execução se algum dos genes essenciais estiver faltando
-            print(f"Atenção: Gene {gene} não encontrado. Abortando a definição de grupos.")
-            return None
+    # 1. Matriz booleana de expressão (> 0), pacientes x GENES_INTERESSE, calculada uma única vez
+    genes_faltando = [gene for gene in GENES_INTERESSE if gene not in df.columns]
+    if genes_faltando:
+        # Para a execução se algum dos genes essenciais estiver faltando
+        print(f"Atenção: Gene(s) {', '.join(genes_faltando)} não encontrado(s). Abortando a definição de grupos.")
+        return None
+    expresso = df[GENES_INTERESSE].to_numpy() > 0
 
     # 2. Definir o grupo complexo (4 Genes Expressos Simultaneamente)
-    g_4_all = (
-        df['IL5RA_expresso'] & 
-        df['IL33_expresso'] & 
-        df['IL25_expresso'] & 
-        df['TSLP_expresso']
-    )
+    g_4_all = expresso.all(axis=1)
     
     # 3. Criar as colunas de comparação para os gráficos
     
     # Comparação 1: (Todos os 4 Genes vs. Todos os Outros)
-    df['grupo_4_genes_vs_outros'] = np.where(
-        g_4_all, 
-        'IL5RA_IL33_IL25_TSLP', # Todos expressos
-        'Demais'                # Pelo menos um não expresso
-    )
-    
-    # Comparações Individuais (Gene vs. Nao Expressa)
-    df['grupo_IL5RA_vs_Nao'] = np.where(
-        df['IL5RA_expresso'], 
-        'Expressa IL5RA', 
-        'Não Expressa IL5RA'
-    )
-    
-    df['grupo_IL33_vs_Nao'] = np.where(
-        df['IL33_expresso'], 
-        'Expressa IL33', 
-        'Não Expressa IL33'
-    )
-    
-    df['grupo_IL25_vs_Nao'] = np.where(
-        df['IL25_expresso'], 
-        'Expressa IL25', 
-        'Não Expressa IL25'
+    df['grupo_4_genes_vs_outros'] = two_group_labels(
+        ~g_4_all, 
+        categories=['Demais',                     # Pelo menos um não expresso
+                    '_'.join(GENES_INTERESSE)]    # Todos expressos (IL5_IL33_IL25_TSLP)
     )
     
-    df['grupo_TSLP_vs_Nao'] = np.where(
-        df['TSLP_expresso'], 
-        'Expressa TSLP', 
-        'Não Expressa TSLP'
-    )
+    # Comparações Individuais (Gene vs. Nao Expressa), uma coluna da matriz por gene
+    for i, nome in enumerate(GENES_INTERESSE):
+        df[f'grupo_{nome}_vs_Nao'] = two_group_labels(
+            expresso[:, i], 
+            categories=[f'Expressa {nome}', f'Não Expressa {nome}']
+        )
     
     return df
 
-def plotar_sobrevida(df_dados, coluna_grupo, titulo, nome_arquivo):
+def plotar_sobrevida(df_dados, agrupamento, titulo, nome_arquivo):
     """
     Gera e salva um gráfico de sobrevida (Kaplan-Meier) para os grupos definidos.
     """
     print(f"Gerando gráfico de Sobrevida: {titulo}")
     
-    df_plot = df_dados.dropna(subset=[COL_TEMPO, COL_EVENTO, coluna_grupo])
-    # Assume-se que 'Ignorar' não existe, mas mantemos o filtro por segurança
-    df_plot = df_plot[df_plot[coluna_grupo] != 'Ignorar']
-    
-    if df_plot.empty or df_plot[coluna_grupo].nunique() < 2:
-        print(f"  -> Aviso: Dados insuficientes para '{titulo}' após filtragem.")
+    # Arrays extraídos uma única vez, usados no teste e em cada ajuste de Kaplan-Meier
+    T_arr = df_dados[COL_TEMPO].to_numpy(dtype=np.float64) / 30.44 # Converte dias para meses
+    E_arr = df_dados[COL_EVENTO].to_numpy()
+    valido = df_dados[[COL_TEMPO, COL_EVENTO]].notna().all(axis=1).to_numpy()
+
+    # Linhas de cada grupo (pré-calculadas no main), sem as amostras com tempo/evento ausente;
+    # as categorias já estão em ordem alfabética
+    grupos_validos = []
+    for grupo, idx in zip(agrupamento['categorias'], agrupamento['indices']):
+        idx = idx[valido[idx]]
+        if len(idx) > 0:
+            grupos_validos.append((grupo, idx))
+
+    if len(grupos_validos) < 2:
+        print(f"  -> Aviso: Dados insuficientes para '{titulo}' após filtragem.")
         return
 
-    T = df_plot[COL_TEMPO] / 30.44 # Converte dias para meses
-    E = df_plot[COL_EVENTO]
-    grupos = df_plot[coluna_grupo]
-    # np.sort garante ordem alfabética e facilita a reprodutibilidade do logrank_test
-    grupos_unicos = np.sort(grupos.unique()) 
+    linhas = np.concatenate([idx for _, idx in grupos_validos])
 
     # --- Análise Estatística (Log-Rank Test) ---
+    # O teste multivariado cobre também o caso de 2 grupos (mesma estatística do logrank_test)
     p_valor = 0.99
     try:
-        if len(grupos_unicos) == 2:
-            # Teste Log-Rank padrão (logrank_test) para 2 grupos
-            grupo_A = grupos_unicos[0]
-            grupo_B = grupos_unicos[1]
-            idx_A = (grupos == grupo_A)
-            idx_B = (grupos == grupo_B)
-            resultado_stats = logrank_test(T[idx_A], T[idx_B], E[idx_A], E[idx_B])
-            p_valor = resultado_stats.p_value 
-        
-        elif len(grupos_unicos) > 2:
-            # Teste Log-Rank multivariado (para 3+ grupos)
-            resultado_stats = multivariate_logrank_test(T, grupos, E)
-            p_valor = resultado_stats.p_value
-            
+        resultado_stats = multivariate_logrank_test(T_arr[linhas], agrupamento['codigos'][linhas], E_arr[linhas])
+        p_valor = resultado_stats.p_value
     except Exception as e:
-        print(f"  -> Erro no teste estatístico (logrank_test): {e}")
+        print(f"  -> Erro no teste estatístico (logrank_test): {e}")
 
     # --- Plotagem (Kaplan-Meier) ---
-    plt.figure(figsize=(10, 7))
-    ax = plt.subplot(111)
+    fig, ax = plt.subplots(figsize=(10, 7))
     kmf = KaplanMeierFitter()
 
-    for grupo in grupos_unicos:
-        idx = (grupos == grupo)
-        if idx.sum() > 0:
-            kmf.fit(T[idx], E[idx], label=f'{grupo} (n={idx.sum()})')
-            # Plotando a função de sobrevivência com intervalo de confiança
-            kmf.plot_survival_function(ax=ax, ci_show=True)
+    for grupo, idx in grupos_validos:
+        kmf.fit(T_arr[idx], E_arr[idx], label=f'{grupo} (n={len(idx)})')
+        # Plotando a função de sobrevivência com intervalo de confiança
+        kmf.plot_survival_function(ax=ax, ci_show=True)
 
     # Exibe o P-Valor no canto inferior esquerdo
     plt.text(0.05, 0.05, f"Log-Rank: {formatar_pval(p_valor)}", transform=ax.transAxes,
@@ -159,34 +129,52 @@ def plotar_sobrevida(df_dados, coluna_grupo, titulo, nome_arquivo):
     plt.tight_layout()
     
     try:
-        plt.savefig(nome_arquivo)
+        fig.savefig(nome_arquivo, dpi=100)
         print(f"  -> Imagem salva: {os.path.basename(nome_arquivo)}")
     except Exception as e:
         print(f"  -> ERRO ao salvar imagem: {e}")
         
-    plt.close()
+    plt.close(fig)
 
-def plotar_pam50(df_dados, coluna_grupo, titulo, nome_arquivo):
+def plotar_pam50(df_dados, agrupamento, titulo, nome_arquivo):
     """
     Gera e salva um gráfico de barras empilhadas (PAM50) para os grupos definidos.
     """
     print(f"Gerando gráfico de PAM50: {titulo}")
     
-    df_plot = df_dados.dropna(subset=[COL_PAM50, coluna_grupo])
-    df_plot = df_plot[df_plot[coluna_grupo] != 'Ignorar']
+    pam50 = df_dados[COL_PAM50]
     
     # --- Filtra o subtipo "Normal" ---
-    if 'Normal' in df_plot[COL_PAM50].values:
-        df_plot = df_plot[df_plot[COL_PAM50] != 'Normal'].copy()
-        print("  -> Subtipo 'Normal' removido da análise PAM50.")
+    normal = (pam50 == 'Normal').to_numpy()
+    if normal.any():
+        print("  -> Subtipo 'Normal' removido da análise PAM50.")
+    valido = pam50.notna().to_numpy() & ~normal
+
+    # Subtipos presentes em ordem alfabética, como no crosstab; ausentes e 'Normal' ficam com código -1
+    pam50_cat = pd.Categorical(pam50.to_numpy(), categories=sorted(pam50[valido].unique()))
+    codigos_pam50 = pam50_cat.codes
 
-    if df_plot.empty or df_plot[COL_PAM50].nunique() < 2:
-        print(f"  -> Aviso: Dados insuficientes para '{titulo}' após filtragem.")
+    if len(pam50_cat.categories) < 2:
+        print(f"  -> Aviso: Dados insuficientes para '{titulo}' após filtragem.")
         return
 
-    # --- Preparação dos Dados (Crosstab) ---
-    df_cross = pd.crosstab(df_plot[coluna_grupo], df_plot[COL_PAM50])
-    df_perc = df_cross.div(df_cross.sum(axis=1), axis=0) * 100
+    # --- Preparação dos Dados (Tabela de Contingência) ---
+    # Uma linha de contagens por grupo, a partir das linhas de cada grupo pré-calculadas no main
+    # (grupos sem amostras válidas ficam de fora, como no crosstab); a mesma matriz de
+    # contagens alimenta as porcentagens e o teste Qui-quadrado
+    grupos_presentes, linhas_contagem = [], []
+    for grupo, idx in zip(agrupamento['categorias'], agrupamento['indices']):
+        codigos = codigos_pam50[idx]
+        codigos = codigos[codigos >= 0]
+        if len(codigos) > 0:
+            grupos_presentes.append(grupo)
+            linhas_contagem.append(np.bincount(codigos, minlength=len(pam50_cat.categories)))
+    contagens = np.array(linhas_contagem, dtype=np.int64)
+    df_perc = pd.DataFrame(
+        contagens / contagens.sum(axis=1, keepdims=True) * 100,
+        index=pd.Index(grupos_presentes, name=agrupamento['coluna']),
+        columns=pd.Index(pam50_cat.categories, name=COL_PAM50)
+    )
     
     # Ordena as colunas do PAM50 para consistência (LumA, LumB, Her2, Basal)
     ordered_keys = ['LumA', 'LumB', 'Her2', 'Basal', 'Normal']
@@ -197,7 +185,7 @@ def plotar_pam50(df_dados, coluna_grupo, titulo, nome_arquivo):
     p_valor = 0.99
     try:
         # Tenta calcular o teste de Qui-quadrado
-        chi2, p_valor, dof, expected = chi2_contingency(df_cross)
+        chi2, p_valor, dof, expected = chi2_contingency(contagens)
     except ValueError as e:
         # Isso pode ocorrer se houver células com frequência zero ou muito pequenas
         print(f"  -> Erro no teste estatístico (chi2_contingency): {e}. P-valor definido como 0.99.")
@@ -213,6 +201,7 @@ def plotar_pam50(df_dados, coluna_grupo, titulo, nome_arquivo):
         figsize=(12, 8),
         color=color_list # Usa a lista de cores customizada
     )
+    fig = ax.figure
 
     # Exibe o P-Valor (abaixo da legenda)
     plt.text(1.02, 0.5, f"Teste Qui-quadrado:\n{formatar_pval(p_valor)}", 
@@ -230,19 +219,19 @@ def plotar_pam50(df_dados, coluna_grupo, titulo, nome_arquivo):
     plt.tight_layout(rect=[0, 0, 0.82, 1]) 
     
     try:
-        plt.savefig(nome_arquivo)
+        fig.savefig(nome_arquivo, dpi=100)
         print(f"  -> Imagem salva: {os.path.basename(nome_arquivo)}")
     except Exception as e:
         print(f"  -> ERRO ao salvar imagem: {e}")
         
-    plt.close()
+    plt.close(fig)
 
 
 def main():
     """
     Função principal: Carrega dados, define grupos e chama as funções de plotagem.
     """
-    print("--- Iniciando Script de Geração de Imagens (IL5RA, IL33, IL25, TSLP) ---")
+    print("--- Iniciando Script de Geração de Imagens (IL5, IL33, IL25, TSLP) ---")
     
     # Tenta criar o objeto Tkinter antes de usá-lo
     try:
@@ -252,6 +241,8 @@ def main():
         print(f"Aviso: Não foi possível inicializar o Tkinter ({e}). A caixa de diálogo de seleção de arquivo pode não funcionar em todos os ambientes.")
         return
 
+    colunas_essenciais = GENES_INTERESSE + [COL_TEMPO, COL_EVENTO, COL_PAM50]
+
     print("\nSelecione o arquivo CSV processado (do Script 1)")
     
     try:
@@ -264,7 +255,9 @@ def main():
             return
             
         print(f"Carregando dados de: {caminho_csv}")
-        df_merged = pd.read_csv(caminho_csv, index_col=0, low_memory=False)
+        # Só as colunas usadas são lidas (o arquivo do Script 1 tem milhares de colunas de genes);
+        # as ausentes são ignoradas aqui e informadas na verificação abaixo
+        df_merged = load_expression_csv(caminho_csv, colunas_essenciais, GENES_INTERESSE)
         caminho_pasta = os.path.dirname(caminho_csv)
         print("Dados carregados com sucesso.")
         
@@ -272,7 +265,6 @@ def main():
         print(f"ERRO ao carregar o arquivo CSV: {e}")
         return
 
-    colunas_essenciais = GENES_INTERESSE + [COL_TEMPO, COL_EVENTO, COL_PAM50]
     # Verifica se as colunas de genes e clínicas existem
     colunas_faltando = [col for col in colunas_essenciais if col not in df_merged.columns]
     
@@ -290,35 +282,63 @@ def main():
 
     # Lista de colunas de grupo a serem plotadas
     grupos_para_plotar = [
-        ('grupo_4_genes_vs_outros', 'IL5RA_IL33_IL25_TSLP vs. Demais', '4_genes'),
-        ('grupo_IL5RA_vs_Nao', 'Expressa IL5RA vs. Não Expressa IL5RA', 'IL5RA'),
+        ('grupo_4_genes_vs_outros', 'IL5_IL33_IL25_TSLP vs. Demais', '4_genes'),
+        ('grupo_IL5_vs_Nao', 'Expressa IL5 vs. Não Expressa IL5', 'IL5'),
         ('grupo_IL33_vs_Nao', 'Expressa IL33 vs. Não Expressa IL33', 'IL33'),
         ('grupo_IL25_vs_Nao', 'Expressa IL25 vs. Não Expressa IL25', 'IL25'),
         ('grupo_TSLP_vs_Nao', 'Expressa TSLP vs. Não Expressa TSLP', 'TSLP'),
     ]
 
-    # --- 4. Gerar Gráficos de Sobrevida ---
-    print("\n--- Gerando Gráficos de Sobrevida ---")
+    # Códigos e linhas de cada grupo, calculados uma única vez por coluna de comparação e
+    # reaproveitados pelos gráficos de sobrevida e de PAM50 (as colunas de grupo são categóricas)
+    agrupamentos = {}
+    for col_grupo, _, _ in grupos_para_plotar:
+        categorias = df_merged[col_grupo].cat.categories
+        codigos = df_merged[col_grupo].cat.codes.to_numpy()
+        agrupamentos[col_grupo] = {
+            'coluna': col_grupo,
+            'codigos': codigos,
+            'categorias': list(categorias),
+            'indices': [np.flatnonzero(codigos == k) for k in range(len(categorias))],
+        }
+
+    # --- 4. Gerar Gráficos de Sobrevida e 5. Gráficos de PAM50 ---
+    # Os 10 gráficos são independentes: cada um é gerado em um processo separado
+    # (com o backend Agg o matplotlib pode rodar em paralelo entre processos).
+    # Cada tarefa recebe só as colunas que usa, para reduzir a cópia dos dados entre processos.
+    df_sobrevida = df_merged[[COL_TEMPO, COL_EVENTO]]
+    df_pam50 = df_merged[[COL_PAM50]]
+    tarefas = []
     for col_grupo, titulo_base, nome_curto in grupos_para_plotar:
-        plotar_sobrevida(
-            df_merged, col_grupo,
+        tarefas.append((
+            plotar_sobrevida, df_sobrevida, agrupamentos[col_grupo],
             f'Sobrevida: {titulo_base}',
             os.path.join(caminho_pasta, f'sobrevida_{nome_curto}.png')
-        )
-    
-    # --- 5. Gerar Gráficos de PAM50 ---
-    print("\n--- Gerando Gráficos de PAM50 ---")
+        ))
     for col_grupo, titulo_base, nome_curto in grupos_para_plotar:
-        plotar_pam50(
-            df_merged, col_grupo,
+        tarefas.append((
+            plotar_pam50, df_pam50, agrupamentos[col_grupo],
             f'Distribuição PAM50: {titulo_base}',
             os.path.join(caminho_pasta, f'pam50_{nome_curto}.png')
-        )
+        ))
+
+    print("\n--- Gerando Gráficos de Sobrevida e PAM50 (em paralelo) ---")
+    n_processos = min(len(tarefas), os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=n_processos, initializer=configurar_estilo) as executor:
+        futuros = [executor.submit(funcao, *argumentos) for funcao, *argumentos in tarefas]
+        for futuro in futuros:
+            try:
+                futuro.result()
+            except Exception as e:
+                print(f"  -> ERRO ao gerar gráfico: {e}")
     
     print("\n--- Processo de Geração de Imagens Concluído ---")
 
-if __name__ == "__main__":
-    # Configurações de estilo para os gráficos
+def configurar_estilo():
+    """
+    Configurações de estilo para os gráficos. Também é o inicializador de cada processo
+    de plotagem, que não executa o bloco principal do script.
+    """
     sns.set_theme(style='whitegrid', palette='deep')
     try:
         plt.rcParams['font.family'] = 'Times New Roman'
@@ -330,5 +350,7 @@ if __name__ == "__main__":
     plt.rcParams['ytick.labelsize'] = 12
     plt.rcParams['legend.fontsize'] = 12
     plt.rcParams['figure.dpi'] = 100
-    
+
+if __name__ == "__main__":
+    configurar_estilo()
     main()
\ No newline at end of file
@@ -1,13 +1,17 @@
 import pandas as pd
 import os
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
 import tkinter as tk
 from tkinter import filedialog
+import matplotlib
+# Os gráficos só são salvos em PNG (nunca exibidos): backend Agg, sem criar janelas/canvas de interface
+matplotlib.use('Agg')
 import matplotlib.pyplot as plt
-import seaborn as sns
-from lifelines import KaplanMeierFitter
-from lifelines.statistics import logrank_test, multivariate_logrank_test
-from scipy.stats import chi2_contingency
+from scipy.stats import chi2
 import numpy as np
+# Leitura do CSV do Script 1, rótulos dos grupos, curvas de Kaplan-Meier e teste log-rank compartilhados
+from survival_common import load_expression_csv, two_group_labels, kaplan_meier_curve, logrank_two_groups
 
 # ---- Plotagem de gráficos de sobrevida dos genes de eos ----
 
@@ -28,6 +32,55 @@ PAM50_COLORS = {
     "Normal": "#008080" 
 }
 
+# --- Gráficos gerados ---
+# (coluna de grupo, título, arquivo do gráfico de sobrevida, arquivo do gráfico de PAM50);
+# os títulos recebem o prefixo "Sobrevida: " ou "Distribuição PAM50: "
+GRAFICOS = [
+    ('grupo_4_vs_outros', 'CLC_EPX_IL5RA_PRG2 vs. Demais',
+     'sobrevida_1_4_vs_demais.png', 'pam50_1_4_vs_demais.png'),
+    ('grupo_PRG2_vs_Nao', 'Expressa PRG2 vs. Não Expressa PRG2',
+     'sobrevida_2_PRG2_vs_Nao.png', 'pam50_2_PRG2_vs_Nao.png'),
+    ('grupo_CLC_vs_Nao', 'Expressa CLC vs. Não Expressa CLC',
+     'sobrevida_3_CLC_vs_Nao.png', 'pam50_3_CLC_vs_Nao.png'),
+    ('grupo_IL5RA_vs_Nao', 'Expressa IL5RA vs. Não Expressa IL5RA',
+     'sobrevida_4_IL5RA_vs_Nao.png', 'pam50_4_IL5RA_vs_Nao.png'),
+    ('grupo_EPX_vs_Nao', 'Expressa EPX vs. Não Expressa EPX',
+     'sobrevida_5_EPX_vs_Nao.png', 'pam50_5_EPX_vs_Nao.png'),
+]
+
+# Figura reaproveitada por todos os gráficos gerados em um mesmo processo: é limpa a cada
+# gráfico, em vez de criar e destruir uma figura (e seu canvas) por imagem
+_figura = None
+
+def nova_figura(tamanho):
+    """Limpa a figura do processo, ajusta o tamanho e retorna (figura, eixo único)."""
+    global _figura
+    if _figura is None:
+        _figura = plt.figure(figsize=tamanho)
+    else:
+        _figura.clear()
+        _figura.set_size_inches(tamanho)
+        plt.figure(_figura.number) # Torna a figura a atual (para as chamadas plt.*)
+    return _figura, _figura.add_subplot(111)
+
+# Versão dos gráficos, incluída na chave do cache: alterar quando o código de plotagem mudar,
+# para que as imagens já existentes sejam geradas de novo
+VERSAO_GRAFICOS = 'v1'
+
+def chave_cache(caminho_csv, coluna_grupo):
+    """Chave (BLAKE2) de um gráfico: arquivo de entrada (data e tamanho), genes, grupo e versão."""
+    texto = (f"{os.path.getmtime(caminho_csv)}-{os.path.getsize(caminho_csv)}-"
+             f"{','.join(GENES_INTERESSE)}-{coluna_grupo}-{VERSAO_GRAFICOS}")
+    return hashlib.blake2b(texto.encode()).hexdigest()
+
+def grafico_em_cache(nome_arquivo, chave):
+    """Indica se a imagem já existe e foi gerada com a mesma chave (arquivo .hash ao lado do PNG)."""
+    caminho_hash = nome_arquivo + '.hash'
+    if not (os.path.exists(nome_arquivo) and os.path.exists(caminho_hash)):
+        return False
+    with open(caminho_hash) as f:
+        return f.read().strip() == chave
+
 def formatar_pval(p_value):
     """Formata um p-valor para exibição no gráfico."""
     p_val_float = float(p_value) 
@@ -42,112 +95,100 @@ def definir_grupos_comparacao(df):
     """
     print("Definindo grupos de comparação...")
     
-    # 1. Criar colunas booleanas para expressão (> 0)
+    # 1. Matriz booleana de expressão (> 0), pacientes x GENES_INTERESSE, em uma única comparação
     for gene in GENES_INTERESSE:
-        if gene in df.columns:
-            df[f'{gene}_expresso'] = df[gene] > 0
-        else:
+        if gene not in df.columns:
             print(f"Atenção: Gene {gene} não encontrado para criar grupos.")
             return None
+    expresso = df[GENES_INTERESSE].to_numpy(dtype=np.float32) > 0
+    # Coluna da matriz de cada gene
+    col_gene = {gene: i for i, gene in enumerate(GENES_INTERESSE)}
 
     # 2. Definir os grupos complexos
     
     # Grupo "4 Genes Expressos"
-    g_4_all = (
-        df['PRG2_expresso'] & 
-        df['EPX_expresso'] & 
-        df['CLC_expresso'] & 
-        df['IL5RA_expresso']
-    )
+    # (todas as colunas da matriz de expressão já calculada, sem reler os genes do DataFrame)
+    g_4_all = expresso.all(axis=1)
     
     # 3. Criar as colunas de comparação para os gráficos
     
     # Comparações 1 e 4: (4 Genes vs. Todos os Outros)
-    df['grupo_4_vs_outros'] = np.where(
+    df['grupo_4_vs_outros'] = two_group_labels(
         g_4_all, 
-        'CLC_EPX_IL5RA_PRG2', # Nome alterado
-        'Demais'              # Nome alterado
+        categories=['CLC_EPX_IL5RA_PRG2',    # Nome alterado
+                    'Demais']                 # Nome alterado
     )
     
     # --- ALTERAÇÃO: Comparações 2 e 5 (PRG2 vs. Nao) ---
     # Substitui a comparação de 3 vias
-    df['grupo_PRG2_vs_Nao'] = np.where(
-        df['PRG2_expresso'], 
-        'Expressa PRG2', 
-        'Não Expressa PRG2'
+    df['grupo_PRG2_vs_Nao'] = two_group_labels(
+        expresso[:, col_gene['PRG2']], 
+        categories=['Expressa PRG2', 'Não Expressa PRG2']
     )
     
     # Comparações 3 e 6: (Expressa CLC vs. Não Expressa CLC)
-    df['grupo_CLC_vs_Nao'] = np.where(
-        df['CLC_expresso'], 
-        'Expressa CLC', 
-        'Não Expressa CLC'
+    df['grupo_CLC_vs_Nao'] = two_group_labels(
+        expresso[:, col_gene['CLC']], 
+        categories=['Expressa CLC', 'Não Expressa CLC']
     )
     
     # --- NOVA ADIÇÃO: Comparações IL5RA vs. Nao ---
-    df['grupo_IL5RA_vs_Nao'] = np.where(
-        df['IL5RA_expresso'], 
-        'Expressa IL5RA', 
-        'Não Expressa IL5RA'
+    df['grupo_IL5RA_vs_Nao'] = two_group_labels(
+        expresso[:, col_gene['IL5RA']], 
+        categories=['Expressa IL5RA', 'Não Expressa IL5RA']
     )
     
     # --- NOVA ADIÇÃO: Comparações EPX vs. Nao ---
-    df['grupo_EPX_vs_Nao'] = np.where(
-        df['EPX_expresso'], 
-        'Expressa EPX', 
-        'Não Expressa EPX'
+    df['grupo_EPX_vs_Nao'] = two_group_labels(
+        expresso[:, col_gene['EPX']], 
+        categories=['Expressa EPX', 'Não Expressa EPX']
     )
     
     return df
 
-def plotar_sobrevida(df_dados, coluna_grupo, titulo, nome_arquivo):
+def plotar_sobrevida(df_sobrevida, T, E, coluna_grupo, titulo, nome_arquivo):
     """
     Gera e salva um gráfico de sobrevida (Kaplan-Meier) para os grupos definidos.
+    df_sobrevida já vem sem tempo/evento ausentes (filtrado uma única vez no main), e T (em meses)
+    e E são os arrays de tempo e evento das suas linhas.
     """
     print(f"Gerando gráfico: {titulo}")
     
-    df_plot = df_dados.dropna(subset=[COL_TEMPO, COL_EVENTO, coluna_grupo])
-    df_plot = df_plot[df_plot[coluna_grupo] != 'Ignorar']
+    grupos = df_sobrevida[coluna_grupo]
     
-    if df_plot.empty or df_plot[coluna_grupo].nunique() < 2:
+    if grupos.empty or grupos.nunique() < 2:
         print(f"  -> Aviso: Dados insuficientes para '{titulo}' após filtragem.")
         return
 
-    T = df_plot[COL_TEMPO] / 30.44 # Converte dias para meses
-    E = df_plot[COL_EVENTO]
-    grupos = df_plot[coluna_grupo]
-    grupos_unicos = np.sort(grupos.unique())
+    # Códigos dos grupos (em ordem alfabética) e linhas ordenadas por grupo: cada grupo vira uma
+    # fatia contígua dos arrays, sem comparar o array de grupos inteiro a cada grupo
+    codigos, grupos_unicos = pd.factorize(grupos, sort=True)
+    ordem = np.argsort(codigos, kind='stable')
+    T_ord, E_ord = T[ordem], E[ordem]
+    inicios = np.searchsorted(codigos[ordem], np.arange(len(grupos_unicos)))
+    fins = np.r_[inicios[1:], len(ordem)]
 
     # --- Análise Estatística (Log-Rank Test) ---
+    # Toda coluna de comparação tem exatamente 2 categorias (e ambas presentes, pela verificação
+    # acima): Teste Log-Rank padrão para 2 grupos, direto sobre as fatias dos arrays
     p_valor = 0.99
     try:
-        if len(grupos_unicos) == 2:
-            # Teste Log-Rank padrão (logrank_test) para 2 grupos
-            grupo_A = grupos_unicos[0]
-            grupo_B = grupos_unicos[1]
-            idx_A = (grupos == grupo_A)
-            idx_B = (grupos == grupo_B)
-            resultado_stats = logrank_test(T[idx_A], T[idx_B], E[idx_A], E[idx_B])
-            p_valor = resultado_stats.p_value 
-        
-        elif len(grupos_unicos) > 2:
-            # Teste Log-Rank multivariado (para 3+ grupos)
-            resultado_stats = multivariate_logrank_test(T, grupos, E)
-            p_valor = resultado_stats.p_value
-            
+        idx_A = slice(inicios[0], fins[0])
+        idx_B = slice(inicios[1], fins[1])
+        p_valor = logrank_two_groups(T_ord[idx_A], E_ord[idx_A], T_ord[idx_B], E_ord[idx_B])
     except Exception as e:
         print(f"  -> Erro no teste estatístico (logrank_test): {e}")
 
     # --- Plotagem (Kaplan-Meier) ---
-    plt.figure(figsize=(10, 7))
-    ax = plt.subplot(111)
-    kmf = KaplanMeierFitter()
+    fig, ax = nova_figura((10, 7))
 
-    for grupo in grupos_unicos:
-        idx = (grupos == grupo)
-        if idx.sum() > 0:
-            kmf.fit(T[idx], E[idx], label=f'{grupo} (n={idx.sum()})')
-            kmf.plot_survival_function(ax=ax, ci_show=True)
+    # Curva em degraus e intervalo de confiança de cada grupo, na mesma cor
+    for grupo, inicio, fim in zip(grupos_unicos, inicios, fins):
+        if fim > inicio:
+            tempos, sobrevida, ic_inferior, ic_superior = kaplan_meier_curve(T_ord[inicio:fim], E_ord[inicio:fim])
+            linha, = ax.step(tempos, sobrevida, where='post', label=f'{grupo} (n={fim - inicio})')
+            ax.fill_between(tempos, ic_inferior, ic_superior, step='post', alpha=0.25,
+                            color=linha.get_color(), linewidth=0)
 
     plt.text(0.05, 0.05, formatar_pval(p_valor), transform=ax.transAxes,
              fontsize=14, fontweight='bold', bbox=dict(facecolor='white', alpha=0.8, boxstyle='round,pad=0.5'))
@@ -157,36 +198,33 @@ def plotar_sobrevida(df_dados, coluna_grupo, titulo, nome_arquivo):
     plt.ylabel('Probabilidade de Sobrevida', fontsize=12)
     plt.legend(title="Grupo", loc='upper right')
     plt.grid(True, linestyle='--', alpha=0.6)
-    plt.tight_layout()
     
     try:
-        plt.savefig(nome_arquivo)
+        # bbox_inches='tight' ajusta as margens (legenda e texto do p-valor) uma única vez, ao salvar
+        fig.savefig(nome_arquivo, dpi=150, bbox_inches='tight')
         print(f"  -> Imagem salva: {os.path.basename(nome_arquivo)}")
+        return True
     except Exception as e:
         print(f"  -> ERRO ao salvar imagem: {e}")
-        
-    plt.close()
+        # (a figura é limpa por nova_figura no próximo gráfico)
+        return False
 
-def plotar_pam50(df_dados, coluna_grupo, titulo, nome_arquivo):
+def plotar_pam50(df_plot, coluna_grupo, titulo, nome_arquivo):
     """
     Gera e salva um gráfico de barras empilhadas (PAM50) para os grupos definidos.
+    df_plot já vem sem PAM50 ausente e sem o subtipo "Normal" (filtrado uma única vez no main).
     """
     print(f"Gerando gráfico: {titulo}")
     
-    df_plot = df_dados.dropna(subset=[COL_PAM50, coluna_grupo])
-    df_plot = df_plot[df_plot[coluna_grupo] != 'Ignorar']
-    
-    # --- ALTERAÇÃO: Filtra o subtipo "Normal" ---
-    if 'Normal' in df_plot[COL_PAM50].values:
-        df_plot = df_plot[df_plot[COL_PAM50] != 'Normal'].copy()
-        print("  -> Subtipo 'Normal' removido da análise PAM50.")
-
     if df_plot.empty or df_plot[COL_PAM50].nunique() < 2:
         print(f"  -> Aviso: Dados insuficientes para '{titulo}' após filtragem.")
         return
 
-    # --- Preparação dos Dados (Crosstab) ---
-    df_cross = pd.crosstab(df_plot[coluna_grupo], df_plot[COL_PAM50])
+    # --- Preparação dos Dados (Tabela de Contingência) ---
+    # groupby + size em vez do crosstab; observed=True deixa de fora os grupos categóricos
+    # sem amostras após a filtragem (como fazia o crosstab com rótulos de texto)
+    df_cross = df_plot.groupby([coluna_grupo, COL_PAM50], observed=True).size().unstack(fill_value=0)
+    
     df_perc = df_cross.div(df_cross.sum(axis=1), axis=0) * 100
     
     # Ordena as colunas do PAM50 para consistência
@@ -194,21 +232,33 @@ def plotar_pam50(df_dados, coluna_grupo, titulo, nome_arquivo):
     df_perc = df_perc[col_order]
 
     # --- Análise Estatística (Qui-Quadrado / Chi-Square) ---
+    # Calculado direto sobre a matriz de contagens, com o mesmo resultado do chi2_contingency
+    # (inclusive a correção de Yates quando há 1 grau de liberdade)
     p_valor = 0.99
-    try:
-        chi2, p_valor, dof, expected = chi2_contingency(df_cross)
-    except ValueError as e:
-        print(f"  -> Erro no teste estatístico (chi2_contingency): {e}")
+    observado = df_cross.to_numpy(dtype=np.float64)
+    esperado = observado.sum(axis=1, keepdims=True) @ observado.sum(axis=0, keepdims=True) / observado.sum()
+    graus_liberdade = (observado.shape[0] - 1) * (observado.shape[1] - 1)
+    if (esperado == 0).any():
+        print(f"  -> Erro no teste estatístico (qui-quadrado): tabela de frequências esperadas com elemento zero.")
+    elif graus_liberdade == 0:
+        p_valor = 1.0
+    else:
+        diferenca = observado - esperado
+        if graus_liberdade == 1:
+            diferenca = np.sign(diferenca) * np.maximum(np.abs(diferenca) - 0.5, 0.0)
+        estatistica = (diferenca ** 2 / esperado).sum()
+        p_valor = chi2.sf(estatistica, graus_liberdade)
 
     # --- Plotagem (Gráfico de Barras Empilhadas) ---
     
     # Pega as cores na ordem correta das colunas
     color_list = [PAM50_COLORS.get(col, '#999999') for col in df_perc.columns]
 
-    ax = df_perc.plot(
+    fig, ax = nova_figura((12, 8))
+    df_perc.plot(
         kind='bar', 
         stacked=True, 
-        figsize=(12, 8),
+        ax=ax,
         color=color_list # Usa a lista de cores customizada
     )
 
@@ -224,16 +274,16 @@ def plotar_pam50(df_dados, coluna_grupo, titulo, nome_arquivo):
     
     plt.legend(title='PAM50', bbox_to_anchor=(1.02, 1), loc='upper left')
     plt.grid(axis='y', linestyle='--', alpha=0.6)
-    # Ajusta o layout para caber a legenda e o texto do p-valor
-    plt.tight_layout(rect=[0, 0, 0.82, 1]) 
     
     try:
-        plt.savefig(nome_arquivo)
+        # bbox_inches='tight' ajusta as margens (legenda e texto do p-valor) uma única vez, ao salvar
+        fig.savefig(nome_arquivo, dpi=150, bbox_inches='tight')
         print(f"  -> Imagem salva: {os.path.basename(nome_arquivo)}")
+        return True
     except Exception as e:
         print(f"  -> ERRO ao salvar imagem: {e}")
-        
-    plt.close()
+        # (a figura é limpa por nova_figura no próximo gráfico)
+        return False
 
 
 def main():
@@ -255,7 +305,10 @@ def main():
             return
             
         print(f"Carregando dados de: {caminho_csv}")
-        df_merged = pd.read_csv(caminho_csv, index_col=0, low_memory=False)
+        # Só as colunas usadas são lidas (o arquivo do Script 1 tem milhares de colunas de genes);
+        # as ausentes são ignoradas aqui e informadas na verificação abaixo
+        colunas_essenciais = GENES_INTERESSE + [COL_TEMPO, COL_EVENTO, COL_PAM50]
+        df_merged = load_expression_csv(caminho_csv, colunas_essenciais, GENES_INTERESSE)
         caminho_pasta = os.path.dirname(caminho_csv)
         print("Dados carregados com sucesso.")
         
@@ -263,7 +316,6 @@ def main():
         print(f"ERRO ao carregar o arquivo CSV: {e}")
         return
 
-    colunas_essenciais = GENES_INTERESSE + [COL_TEMPO, COL_EVENTO, COL_PAM50]
     # Verifica se as colunas de genes e clínicas existem
     colunas_faltando = [col for col in colunas_essenciais if col not in df_merged.columns]
     
@@ -277,96 +329,89 @@ def main():
         print("ERRO: Falha ao definir os grupos (genes essenciais ausentes). Encerrando.")
         return
 
-    # --- 4. Gerar Gráficos de Sobrevida ---
-    print("\n--- Gerando Gráficos de Sobrevida ---")
-    
-    # Imagem 1: 4 Genes vs. Demais
-    plotar_sobrevida(
-        df_merged, 'grupo_4_vs_outros',
-        'Sobrevida: CLC_EPX_IL5RA_PRG2 vs. Demais',
-        os.path.join(caminho_pasta, 'sobrevida_1_4_vs_demais.png')
-    )
-    
-    # --- ALTERAÇÃO: Imagem 2 (PRG2 vs Nao) ---
-    plotar_sobrevida(
-        df_merged, 'grupo_PRG2_vs_Nao',
-        'Sobrevida: Expressa PRG2 vs. Não Expressa PRG2',
-        os.path.join(caminho_pasta, 'sobrevida_2_PRG2_vs_Nao.png')
-    )
-    
-    # Imagem 3: Expressa CLC vs. Não Expressa CLC
-    plotar_sobrevida(
-        df_merged, 'grupo_CLC_vs_Nao',
-        'Sobrevida: Expressa CLC vs. Não Expressa CLC',
-        os.path.join(caminho_pasta, 'sobrevida_3_CLC_vs_Nao.png')
-    )
+    # Subconjuntos filtrados uma única vez e reaproveitados por todos os gráficos
+    # (as colunas de grupo não têm valores ausentes)
+    df_surv = df_merged.dropna(subset=[COL_TEMPO, COL_EVENTO])
+    T_meses = df_surv[COL_TEMPO].to_numpy(dtype=np.float64) * (1.0 / 30.44) # Converte dias para meses
+    # Sem ausentes, o evento (0/1) cabe em int8
+    E_surv = df_surv[COL_EVENTO].to_numpy(dtype=np.int8)
 
-    # --- NOVA ADIÇÃO: Imagem 4 (IL5RA vs Nao) ---
-    plotar_sobrevida(
-        df_merged, 'grupo_IL5RA_vs_Nao',
-        'Sobrevida: Expressa IL5RA vs. Não Expressa IL5RA',
-        os.path.join(caminho_pasta, 'sobrevida_4_IL5RA_vs_Nao.png')
-    )
-    
-    # --- NOVA ADIÇÃO: Imagem 5 (EPX vs Nao) ---
-    plotar_sobrevida(
-        df_merged, 'grupo_EPX_vs_Nao',
-        'Sobrevida: Expressa EPX vs. Não Expressa EPX',
-        os.path.join(caminho_pasta, 'sobrevida_5_EPX_vs_Nao.png')
-    )
+    # --- ALTERAÇÃO: Filtra o subtipo "Normal" ---
+    # PAM50 ausente e subtipo "Normal" removidos com uma única máscara e uma única seleção
+    pam50 = df_merged[COL_PAM50]
+    normal = pam50.to_numpy() == 'Normal'
+    if normal.any():
+        print("Subtipo 'Normal' removido da análise PAM50.")
+    df_pam = df_merged.loc[pam50.notna().to_numpy() & ~normal]
 
-    # --- 5. Gerar Gráficos de PAM50 ---
-    print("\n--- Gerando Gráficos de PAM50 ---")
-    
-    # Imagem 4: 4 Genes vs. Demais
-    plotar_pam50(
-        df_merged, 'grupo_4_vs_outros',
-        'Distribuição PAM50: CLC_EPX_IL5RA_PRG2 vs. Demais',
-        os.path.join(caminho_pasta, 'pam50_1_4_vs_demais.png')
-    )
-    
-    # --- ALTERAÇÃO: Imagem 5 (PRG2 vs Nao) ---
-    plotar_pam50(
-        df_merged, 'grupo_PRG2_vs_Nao',
-        'Distribuição PAM50: Expressa PRG2 vs. Não Expressa PRG2',
-        os.path.join(caminho_pasta, 'pam50_2_PRG2_vs_Nao.png')
-    )
-    
-    # Imagem 6: Expressa CLC vs. Não Expressa CLC
-    plotar_pam50(
-        df_merged, 'grupo_CLC_vs_Nao',
-        'Distribuição PAM50: Expressa CLC vs. Não Expressa CLC',
-        os.path.join(caminho_pasta, 'pam50_3_CLC_vs_Nao.png')
-    )
-    
-    # --- NOVA ADIÇÃO: Imagem 9 (IL5RA vs Nao) ---
-    plotar_pam50(
-        df_merged, 'grupo_IL5RA_vs_Nao',
-        'Distribuição PAM50: Expressa IL5RA vs. Não Expressa IL5RA',
-        os.path.join(caminho_pasta, 'pam50_4_IL5RA_vs_Nao.png')
-    )
-    
-    # --- NOVA ADIÇÃO: Imagem 10 (EPX vs Nao) ---
-    plotar_pam50(
-        df_merged, 'grupo_EPX_vs_Nao',
-        'Distribuição PAM50: Expressa EPX vs. Não Expressa EPX',
-        os.path.join(caminho_pasta, 'pam50_5_EPX_vs_Nao.png')
-    )
+    # Os gráficos são independentes: as chamadas são reunidas em uma lista de tarefas e
+    # geradas em paralelo no final. Cada tarefa recebe só as colunas que usa, para reduzir
+    # a cópia dos dados entre processos.
+    tarefas = []
+    # --- 4. Gráficos de Sobrevida e 5. Gráficos de PAM50, um par por coluna de grupo ---
+    for coluna_grupo, titulo_base, arquivo_sobrevida, arquivo_pam50 in GRAFICOS:
+        tarefas.append((
+            plotar_sobrevida, df_surv[[coluna_grupo]], T_meses, E_surv, coluna_grupo,
+            f'Sobrevida: {titulo_base}',
+            os.path.join(caminho_pasta, arquivo_sobrevida)
+        ))
+        tarefas.append((
+            plotar_pam50, df_pam[[COL_PAM50, coluna_grupo]], coluna_grupo,
+            f'Distribuição PAM50: {titulo_base}',
+            os.path.join(caminho_pasta, arquivo_pam50)
+        ))
+
+    # Cache: gráficos cuja imagem já foi gerada a partir do mesmo arquivo de entrada são pulados.
+    # Os três últimos argumentos de cada tarefa são a coluna de grupo, o título e o arquivo de saída.
+    chaves = {}
+    pendentes = []
+    for funcao, *argumentos in tarefas:
+        coluna_grupo, nome_arquivo = argumentos[-3], argumentos[-1]
+        chaves[nome_arquivo] = chave_cache(caminho_csv, coluna_grupo)
+        if grafico_em_cache(nome_arquivo, chaves[nome_arquivo]):
+            print(f"  -> Imagem já atualizada (cache): {os.path.basename(nome_arquivo)}")
+        else:
+            pendentes.append((funcao, *argumentos))
+
+    if not pendentes:
+        print("\nTodas as imagens já estão atualizadas.")
+        return
+
+    print("\n--- Gerando Gráficos de Sobrevida e PAM50 (em paralelo) ---")
+    n_processos = min(len(pendentes), os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=n_processos, initializer=configurar_estilo) as executor:
+        futuros = {executor.submit(funcao, *argumentos): argumentos[-1] for funcao, *argumentos in pendentes}
+        for futuro, nome_arquivo in futuros.items():
+            try:
+                # A chave só é gravada quando a imagem foi salva (a função retorna True)
+                if futuro.result():
+                    with open(nome_arquivo + '.hash', 'w') as f:
+                        f.write(chaves[nome_arquivo])
+            except Exception as e:
+                print(f"  -> ERRO ao gerar gráfico: {e}")
     
     print("\n--- Processo de Geração de Imagens Concluído ---")
 
+def configurar_estilo():
+    """
+    Configurações de estilo para os gráficos. Também é o inicializador de cada processo
+    de plotagem, que não executa o bloco principal do script.
+    """
+    # Folhas de estilo do matplotlib equivalentes ao tema do seaborn (whitegrid + paleta deep),
+    # aplicadas direto, sem passar pela reconfiguração do seaborn
+    plt.style.use(['seaborn-v0_8-whitegrid', 'seaborn-v0_8-deep'])
+    plt.rcParams.update({
+        # Arial se disponível; senão o matplotlib passa para a próxima fonte da lista
+        'font.family': ['Arial', 'DejaVu Sans'],
+        'axes.titlesize': 18,
+        'axes.labelsize': 14,
+        'xtick.labelsize': 12,
+        'ytick.labelsize': 12,
+        'legend.fontsize': 12,
+        # Resolução de tela menor para o desenho; a resolução final é definida só no savefig
+        'figure.dpi': 72,
+    })
+
 if __name__ == "__main__":
-    sns.set_theme(style='whitegrid', palette='deep')
-    # Tenta usar uma fonte mais profissional se disponível
-    try:
-        plt.rcParams['font.family'] = 'Arial'
-    except:
-        print("Fonte Arial não encontrada, usando fonte padrão.")
-    plt.rcParams['axes.titlesize'] = 18
-    plt.rcParams['axes.labelsize'] = 14
-    plt.rcParams['xtick.labelsize'] = 12
-    plt.rcParams['ytick.labelsize'] = 12
-    plt.rcParams['legend.fontsize'] = 12
-    plt.rcParams['figure.dpi'] = 100
-    
+    configurar_estilo()
     main()
\ No newline at end of file
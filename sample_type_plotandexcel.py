@@ -3,11 +3,28 @@ import os
 import tkinter as tk
 from tkinter import filedialog
 from datetime import datetime
+import matplotlib
+# O gráfico só é salvo em arquivo (nunca exibido): backend Agg, sem inicializar uma interface gráfica
+matplotlib.use('Agg')
 import matplotlib.pyplot as plt
 from scipy.stats import norm
 import numpy as np
-import math
-import openpyxl
+from io_utils import read_cached # Cópia em Parquet do arquivo de entrada
+
+# Leitor PyArrow (multithread, colunar) quando disponível; caso contrário, o motor C padrão do pandas
+try:
+    import pyarrow
+    MOTOR_CSV = 'pyarrow'
+except ImportError:
+    MOTOR_CSV = 'c'
+
+# XlsxWriter (somente escrita, bem mais rápido) quando disponível; caso contrário, openpyxl
+try:
+    import xlsxwriter
+    MOTOR_EXCEL = 'xlsxwriter'
+except ImportError:
+    import openpyxl
+    MOTOR_EXCEL = 'openpyxl'
 
 # --- Mapeamento dos Códigos de Tipo de Amostra (Sample-Type) do TCGA ---
 # Estes códigos são os dois dígitos na 4ª posição do barcode (ex: TCGA-XX-YYYY-ZZ-A)
@@ -33,61 +50,101 @@ SAMPLE_TYPE_CODES = {
     '61': 'Cell Line Derived Xenograft Tissue (Tecido Xenográfico Derivado de Linhagem)',
 }
 
-def extract_sample_type_code(tcga_barcode):
-    """Extrai o código de 2 dígitos do tipo de amostra do barcode TCGA."""
-    try:
-        parts = tcga_barcode.split('-')
-        if len(parts) >= 4:
-            return parts[3][:2]
-        return 'UNKNOWN'
-    except Exception:
-        return 'UNKNOWN'
+def _descricao_curta(descricao):
+    """Extrai APENAS o termo principal da tradução (entre parênteses, antes do primeiro traço "-")."""
+    # Ex: de "Tumor Sólido Primário - Geralmente Ressecção Cirúrgica" para "Tumor Sólido Primário"
+    return descricao.split('(')[1].rstrip(')').split('-')[0].strip() if '(' in descricao else descricao
+
+# Descrições curtas usadas nos rótulos do gráfico, calculadas uma vez para cada código
+SAMPLE_TYPE_SHORT = {codigo: _descricao_curta(descricao) for codigo, descricao in SAMPLE_TYPE_CODES.items()}
+
+# Valores Z por nível de confiança, calculados uma única vez (norm.ppf é caro);
+# o de 95% (o usado no gráfico) já fica pronto na importação
+VALORES_Z = {0.95: float(norm.ppf(0.975))}
+
+def extract_sample_type_codes(tcga_barcodes):
+    """
+    Extrai o código de 2 dígitos do tipo de amostra de uma coluna inteira de barcodes TCGA
+    (até 2 caracteres do 4º campo separado por '-'); barcodes sem esse campo viram 'UNKNOWN'.
+    """
+    return (tcga_barcodes.astype(str)
+            .str.extract(r'^(?:[^-]*-){3}([^-]{0,2})', expand=False)
+            .fillna('UNKNOWN'))
 
 def tentar_ler_csv_ou_tsv(file_path):
-    """Tenta ler o arquivo como TSV e, se falhar, tenta como CSV. Retorna o DataFrame e o separador usado."""
-    print("Tentando ler o arquivo como TSV (separador '\\t')...")
-    try:
-        df = pd.read_csv(file_path, sep='\t')
-        if not df.empty and len(df.columns) > 1:
-            print("Sucesso na leitura como TSV.")
-            return df, '\t'
-        print("Falha na leitura TSV ou DataFrame vazio/mal-formado. Tentando CSV...")
-    except Exception:
-        print("Falha na leitura TSV. Tentando CSV...")
-        
-    print("Tentando ler o arquivo como CSV (separador ',')...")
+    """
+    Detecta o separador (TAB ou vírgula) pelos primeiros 4 KB do arquivo e lê dele só a primeira
+    coluna (os barcodes, a única usada). Retorna o DataFrame e o separador usado.
+    """
     try:
-        df = pd.read_csv(file_path, sep=',')
-        if not df.empty and len(df.columns) > 1:
-            print("Sucesso na leitura como CSV.")
-            return df, ','
-        print("Falha na leitura CSV ou DataFrame vazio/mal-formado.")
-    except Exception:
-        print("Falha na leitura CSV.")
-        
-    return None, None
+        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+            inicio = f.read(4096)
+    except Exception as e:
+        print(f"Falha ao abrir o arquivo: {e}")
+        return None, None
+
+    # O separador que mais aparece no início do arquivo; em caso de empate, TSV (como antes)
+    separador = '\t' if inicio.count('\t') >= inicio.count(',') else ','
+    formato = 'TSV' if separador == '\t' else 'CSV'
+    # Sem nenhum dos dois separadores no início, o arquivo não é uma tabela CSV/TSV
+    if separador not in inicio:
+        print("Falha na detecção do separador: nem TAB nem vírgula no início do arquivo (arquivo mal-formado).")
+        return None, None
+
+    def ler():
+        print(f"Lendo a primeira coluna do arquivo como {formato} (separador {separador!r})...")
+
+        try:
+            # Com PyArrow, a leitura é multithread e a coluna fica em tipo Arrow em vez de 'object'.
+            # O PyArrow só aceita usecols por nome e não conhece o nome 'Unnamed: 0' que o pandas
+            # dá a um cabeçalho vazio; nesse caso (e sem PyArrow) a coluna é pedida pela posição.
+            primeira_coluna = pd.read_csv(file_path, sep=separador, nrows=0).columns[0]
+            if MOTOR_CSV == 'pyarrow' and not str(primeira_coluna).startswith('Unnamed:'):
+                df = pd.read_csv(file_path, sep=separador, usecols=[primeira_coluna],
+                                 engine='pyarrow', dtype_backend='pyarrow')
+            else:
+                df = pd.read_csv(file_path, sep=separador, usecols=[0])
+        except Exception:
+            print(f"Falha na leitura {formato}.")
+            return None
+
+        if df.empty:
+            print(f"Falha na leitura {formato}: DataFrame vazio.")
+            return None
+
+        print(f"Sucesso na leitura como {formato}.")
+        return df
+
+    # Cópia em Parquet ao lado do arquivo, só com a coluna de barcodes
+    df = read_cached(file_path, ('barcodes', separador), ler, dtype_backend='pyarrow')
+    if df is None:
+        return None, None
+    return df, separador
 
 def calcular_intervalo_confianca_wilson(k, n, nivel_confianca=0.95):
     """
     Calcula o Intervalo de Confiança (CI) usando o Wilson Score Interval para proporções.
-    k: número de sucessos (count), n: número total de tentativas (total_samples).
-    Retorna a margem de erro.
+    k: número de sucessos (count) — um valor ou um array com todas as contagens de uma vez,
+    n: número total de tentativas (total_samples).
+    Retorna a margem de erro (um array, com o mesmo formato de k).
     """
+    k = np.asarray(k, dtype=np.float64)
     if n == 0:
-        return 0.0 # Sem amostras
+        return np.zeros_like(k) # Sem amostras
     
-    # Nível de significância (alfa)
-    alfa = 1 - nivel_confianca
-    
-    # Z-score (valor Z para a distribuição normal padrão)
-    z = norm.ppf(1 - alfa / 2)
+    # Z-score (valor Z para a distribuição normal padrão), guardado em VALORES_Z após o primeiro cálculo
+    z = VALORES_Z.get(nivel_confianca)
+    if z is None:
+        # Nível de significância (alfa)
+        alfa = 1 - nivel_confianca
+        z = VALORES_Z[nivel_confianca] = float(norm.ppf(1 - alfa / 2))
     
     # Proporção
     p = k / n
     
-    # Cálculo do intervalo de Wilson
+    # Cálculo do intervalo de Wilson (vetorizado sobre todas as contagens)
     termo1 = p + (z*z) / (2*n)
-    termo2 = z * math.sqrt(p * (1 - p) / n + (z * z) / (4 * n * n))
+    termo2 = z * np.sqrt(p * (1 - p) / n + (z * z) / (4 * n * n))
     denominador = 1 + (z * z) / n
     
     lower_bound = (termo1 - termo2) / denominador
@@ -104,11 +161,9 @@ def gerar_grafico_barras_estatistico(summary_df, total_samples, output_path):
     # 1. Preparar os dados para plotagem
     codes = summary_df['Código do Tipo'].tolist()
     
-    # ALTERAÇÃO SOLICITADA: Extrair APENAS o termo principal da tradução (antes do primeiro traço "-")
-    # Ex: de "Tumor Sólido Primário - Geralmente Ressecção Cirúrgica" para "Tumor Sólido Primário"
-    descriptions = summary_df['Descrição da Amostra'].apply(
-        lambda x: x.split('(')[1].rstrip(')').split('-')[0].strip() if '(' in x else x
-    ).tolist() 
+    # ALTERAÇÃO SOLICITADA: APENAS o termo principal da tradução (tabela SAMPLE_TYPE_SHORT);
+    # códigos fora do mapeamento mantêm a descrição genérica
+    descriptions = [SAMPLE_TYPE_SHORT.get(c, 'Outros/Desconhecido') for c in codes]
     
     counts = summary_df['Contagem Absoluta'].tolist()
     percentages = summary_df['Porcentagem (%)'].tolist()
@@ -117,13 +172,9 @@ def gerar_grafico_barras_estatistico(summary_df, total_samples, output_path):
     labels = [f"{c} - {d}" for c, d in zip(codes, descriptions)]
 
     # 2. Calcular as Barras de Erro (Margem de Erro do CI 95% do Wilson Score)
-    error_bars_count = []
-    for count in counts:
-        # Erro é calculado na proporção
-        me_proportion = calcular_intervalo_confianca_wilson(count, total_samples)
-        # Convertemos para a escala da contagem (y-axis)
-        error_count = me_proportion * total_samples
-        error_bars_count.append(error_count)
+    # Erro é calculado na proporção, para todas as barras de uma vez,
+    # e convertido para a escala da contagem (y-axis)
+    error_array = calcular_intervalo_confianca_wilson(counts, total_samples) * total_samples
     
     # 3. Criar o Gráfico
     # Ajuste o tamanho da figura para acomodar rótulos longos
@@ -131,27 +182,18 @@ def gerar_grafico_barras_estatistico(summary_df, total_samples, output_path):
     
     # Plotar as barras com as barras de erro
     # Transpõe as barras de erro para serem simétricas em torno da média para visualização
-    error_array = np.array(error_bars_count)
     bar_container = ax.bar(labels, counts, yerr=error_array, capsize=5, 
                            color='#059669', edgecolor='black', linewidth=0.7)
     
     # 4. Adicionar anotações (n e %) acima de cada barra
-    y_lim_max = ax.get_ylim()[1] # Limite superior do eixo Y para referência
-    
-    for bar, count, percent, error in zip(bar_container, counts, percentages, error_array):
-        height = bar.get_height()
-        
-        # Posição da anotação: no topo da barra + erro + uma pequena margem (2% do limite max do Y)
-        text_pos_y = height + error + (y_lim_max * 0.02)
-
-        # O texto é formatado como "n=X (Y.Y%)"
-        label = f'n={count}\n({percent:.2f}%)'
-        
-        ax.text(bar.get_x() + bar.get_width() / 2., text_pos_y,
-                label,
-                ha='center', va='bottom', fontsize=10, 
-                fontweight='bold', 
-                bbox=dict(facecolor='white', alpha=0.8, edgecolor='none', boxstyle="round,pad=0.3"))
+    # O texto é formatado como "n=X (Y.Y%)"
+    bar_texts = [f'n={count}\n({percent:.2f}%)' for count, percent in zip(counts, percentages)]
+    
+    # bar_label posiciona todas as anotações de uma vez, acima do topo da barra de erro
+    # (padding: pequena margem, em pontos, entre a barra de erro e o texto)
+    ax.bar_label(bar_container, labels=bar_texts, padding=8,
+                 fontsize=10, fontweight='bold',
+                 bbox=dict(facecolor='white', alpha=0.8, edgecolor='none', boxstyle="round,pad=0.3"))
 
     # 5. Configurações de Título e Eixos
     
@@ -189,8 +231,27 @@ def gerar_grafico_barras_estatistico(summary_df, total_samples, output_path):
     
     return caminho_grafico_saida
 
-def finalizar_processamento_e_gerar_arquivos(df_processed, input_file):
-    """Gera o arquivo Excel de resumo e chama a função de plotagem."""
+def resumir_tipos_amostra(df):
+    """
+    Conta as amostras por código de tipo e monta a tabela de resumo. Sample_Code é categórica
+    (categorias já em ordem): a contagem é um bincount sobre os códigos inteiros.
+    """
+    sample_code = df['Sample_Code'].astype('category')
+    categorias = sample_code.cat.categories
+    contagens = np.bincount(sample_code.cat.codes.to_numpy(), minlength=len(categorias))
+    # Só os tipos presentes no arquivo entram na tabela
+    presentes = contagens > 0
+    codigos, contagens = categorias[presentes].tolist(), contagens[presentes]
+    total_samples = len(df)
+    return pd.DataFrame({
+        'Código do Tipo': codigos,
+        'Descrição da Amostra': [SAMPLE_TYPE_CODES.get(c, 'Outros/Desconhecido') for c in codigos],
+        'Contagem Absoluta': contagens,
+        'Porcentagem (%)': np.round(contagens / total_samples * 100, 2),
+    })
+
+def finalizar_processamento_e_gerar_arquivos(summary_df, total_samples, input_file):
+    """Gera o arquivo Excel de resumo (a partir da tabela já calculada) e chama a função de plotagem."""
     
     # Gerar carimbo de data/hora
     timestamp = datetime.now().strftime('%y%m%d_%H%M%S')
@@ -199,23 +260,27 @@ def finalizar_processamento_e_gerar_arquivos(df_processed, input_file):
     diretorio_entrada = os.path.dirname(input_file)
     nome_excel_saida = f'TCGA_Resumo_Estatisticas_{timestamp}.xlsx'
     caminho_excel_saida = os.path.join(diretorio_entrada, nome_excel_saida)
-    
-    total_samples = len(df_processed)
-    
-    # 2. Criar o DataFrame de Resumo
-    summary_df = df_processed.groupby(['Sample_Code', 'Sample_Type_Desc']).size().reset_index(name='Contagem Absoluta')
-    summary_df['Porcentagem (%)'] = (summary_df['Contagem Absoluta'] / total_samples * 100).round(2)
-    summary_df.columns = ['Código do Tipo', 'Descrição da Amostra', 'Contagem Absoluta', 'Porcentagem (%)']
-    summary_df = summary_df.sort_values(by='Código do Tipo').reset_index(drop=True)
+
+    # 2. O DataFrame de Resumo já vem pronto de processar_dados_tcga
 
     print(f"\nEscrevendo a planilha de resumo estatístico no arquivo Excel: {caminho_excel_saida}...")
     
     # 3. Processo de Escrita no Excel
     try:
-        with pd.ExcelWriter(caminho_excel_saida, engine='openpyxl') as writer:
-            sheet_name_resumo = "Resumo Estatístico"
-            summary_df.to_excel(writer, sheet_name=sheet_name_resumo, index=False)
-            print(f" -> Planilha '{sheet_name_resumo}' criada com sucesso.")
+        sheet_name_resumo = "Resumo Estatístico"
+        if MOTOR_EXCEL == 'xlsxwriter':
+            with pd.ExcelWriter(caminho_excel_saida, engine=MOTOR_EXCEL) as writer:
+                summary_df.to_excel(writer, sheet_name=sheet_name_resumo, index=False)
+        else:
+            # openpyxl em modo somente escrita: as linhas são gravadas em sequência,
+            # sem montar a planilha inteira (com objetos de estilo) na memória
+            workbook = openpyxl.Workbook(write_only=True)
+            worksheet = workbook.create_sheet(sheet_name_resumo)
+            worksheet.append(list(summary_df.columns))
+            for linha in summary_df.itertuples(index=False):
+                worksheet.append(list(linha))
+            workbook.save(caminho_excel_saida)
+        print(f" -> Planilha '{sheet_name_resumo}' criada com sucesso.")
 
     except Exception as e:
         print(f"ERRO: Ocorreu um erro ao escrever no Excel. Verifique se o arquivo está aberto ou se há permissões de escrita. Erro: {e}")
@@ -229,38 +294,42 @@ def finalizar_processamento_e_gerar_arquivos(df_processed, input_file):
     return 1
 
 def processar_dados_tcga(input_file):
-    """Lê, extrai e sumariza os tipos de amostra."""
+    """Lê, extrai e sumariza os tipos de amostra. Retorna o DataFrame processado e a tabela de resumo."""
     
     # 1. Tentar ler o arquivo
     df, separador = tentar_ler_csv_ou_tsv(input_file)
 
     if df is None or df.empty:
         print("\nERRO CRÍTICO: Não foi possível carregar os dados. Verifique se o arquivo está no formato CSV/TSV e não está vazio.")
-        return None
+        return None, None
 
-    # 2. Identificar a coluna de barcode (a primeira coluna)
-    barcode_column = df.columns[0]
-    df.rename(columns={barcode_column: 'TCGA_Barcode'}, inplace=True)
+    # 2. Identificar a coluna de barcode (a primeira coluna, a única lida do arquivo)
     barcode_column = 'TCGA_Barcode'
+    df = df.rename(columns={df.columns[0]: barcode_column})
     
     print(f"Coluna de Barcode identificada como: '{barcode_column}' (Separador usado: '{separador}')")
 
     # 3. Extrair os códigos de tipo de amostra
-    df['Sample_Code'] = df[barcode_column].apply(extract_sample_type_code)
+    # Poucos códigos distintos: categórica (1 byte por amostra em vez de um objeto string)
+    df['Sample_Code'] = extract_sample_type_codes(df[barcode_column]).astype('category')
     
     # Mapear o código para uma descrição legível
-    df['Sample_Type_Desc'] = df['Sample_Code'].map(SAMPLE_TYPE_CODES).fillna('Outros/Desconhecido')
+    # (em uma coluna categórica o map só é aplicado às categorias, não a cada linha)
+    df['Sample_Type_Desc'] = (df['Sample_Code']
+                              .map(lambda codigo: SAMPLE_TYPE_CODES.get(codigo, 'Outros/Desconhecido'))
+                              .astype('category'))
 
     print("\n--- Contagem de Amostras por Código TCGA ---")
     total_samples = len(df)
-    summary = df.groupby(['Sample_Code', 'Sample_Type_Desc']).size().reset_index(name='Contagem')
-    summary['Porcentagem'] = (summary['Contagem'] / total_samples * 100).round(2).astype(str) + '%'
-    summary.columns = ['Código', 'Descrição da Amostra', 'Contagem', 'Porcentagem']
-    summary = summary[['Código', 'Descrição da Amostra', 'Contagem', 'Porcentagem']]
-    print(summary.to_string(index=False))
+    summary_df = resumir_tipos_amostra(df)
+    # Mesma tabela usada no Excel, impressa com os nomes curtos e a porcentagem formatada
+    # na hora (sem copiar a tabela nem criar uma coluna de texto só para o console)
+    print(summary_df.to_string(index=False,
+                               header=['Código', 'Descrição da Amostra', 'Contagem', 'Porcentagem'],
+                               formatters={'Porcentagem (%)': lambda valor: f"{valor}%"}))
     print(f"\nTOTAL DE AMOSTRAS PROCESSADAS: {total_samples}")
     
-    return df
+    return df, summary_df
 
 def selecionar_arquivo_bruto():
     """Abre uma caixa de diálogo para o usuário selecionar o arquivo de dados."""
@@ -286,9 +355,9 @@ if __name__ == "__main__":
     caminho_arquivo = selecionar_arquivo_bruto()
     
     if caminho_arquivo:
-        df_processado = processar_dados_tcga(caminho_arquivo)
+        df_processado, summary_df = processar_dados_tcga(caminho_arquivo)
 
         if df_processado is not None and not df_processado.empty:
-            finalizar_processamento_e_gerar_arquivos(df_processado, caminho_arquivo)
+            finalizar_processamento_e_gerar_arquivos(summary_df, len(df_processado), caminho_arquivo)
         else:
             print("\nO processamento falhou ou o DataFrame está vazio. Não foi possível gerar o Excel ou o Gráfico.")
\ No newline at end of file
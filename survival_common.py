@@ -0,0 +1,485 @@
+# Funções compartilhadas pelas análises de sobrevida de Kaplan-Meier por soma da expressão de um grupo de genes
+# (survival_presence_CLC.py, survival_recruit_CCL24.py e run_all.py); a leitura dos dados, o Kaplan-Meier
+# e o log-rank também são usados por survival_manut_IL5.py e pelos scripts s3_mamanalysis_*
+
+import pandas as pd
+import numpy as np
+import sys
+import os
+from io_utils import column_positions, read_csv_columns, read_cached # Leitura só das colunas usadas do CSV e cópias em Parquet
+
+# PyArrow (opcional): leitor de CSV multithread e cópia em Parquet dos dados de entrada;
+# sem ele, o motor C padrão do pandas
+try:
+    import pyarrow
+    MOTOR_CSV = 'pyarrow'
+except ImportError:
+    MOTOR_CSV = 'c'
+
+# Numba (opcional): compila o laço do teste log-rank sobre os tempos de evento
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+if njit is not None:
+    @njit(cache=True)
+    def logrank_kernel(times, events, group_b):
+        """
+        Estatística z do log-rank em um único laço sobre as amostras dos dois grupos já ordenadas
+        por tempo (group_b: True para o grupo B). Em cada tempo com óbito acumula observados - esperados
+        e a variância hipergeométrica do grupo A; os em risco são as amostras com T >= t.
+        Com variância zero (ex: nenhum óbito), retorna 0 (ver logrank_z).
+        """
+        at_risk_A = 0
+        for j in range(times.shape[0]):
+            if not group_b[j]:
+                at_risk_A += 1
+        at_risk_B = times.shape[0] - at_risk_A
+        
+        observed_minus_expected = 0.0
+        variance = 0.0
+        i = 0
+        while i < times.shape[0]:
+            # Amostras (óbitos e censuras) com o mesmo tempo
+            d_A = d_B = c_A = c_B = 0
+            j = i
+            while j < times.shape[0] and times[j] == times[i]:
+                if group_b[j]:
+                    c_B += 1
+                    if events[j]:
+                        d_B += 1
+                else:
+                    c_A += 1
+                    if events[j]:
+                        d_A += 1
+                j += 1
+            
+            d = d_A + d_B
+            if d > 0:
+                n = at_risk_A + at_risk_B
+                observed_minus_expected += d_A - d * at_risk_A / n
+                # Nos tempos com uma única amostra em risco a variância é zero
+                if n > 1:
+                    variance += at_risk_A * at_risk_B * d * (n - d) / (n * n * (n - 1.0))
+            
+            at_risk_A -= c_A
+            at_risk_B -= c_B
+            i = j
+        # Sem este teste, a divisão por zero levanta ZeroDivisionError no código compilado
+        if variance == 0.0:
+            return 0.0
+        return observed_minus_expected / np.sqrt(variance)
+
+def read_excel_sheet(file_path: str, sheet_name, required_cols: list = None):
+    """
+    Lê uma planilha do Excel com o motor calamine (Rust, python-calamine), se instalado; senão, com o padrão (openpyxl).
+    Com required_cols, só a primeira coluna (índice) e essas colunas são lidas, escolhidas pela posição no cabeçalho.
+    """
+    def read(**options):
+        try:
+            return pd.read_excel(file_path, sheet_name=sheet_name, engine='calamine', **options)
+        except ImportError:
+            return pd.read_excel(file_path, sheet_name=sheet_name, **options)
+
+    # O cabeçalho é lido antes, para saber quais colunas da planilha pedir
+    usecols = column_positions(read(nrows=0).columns, required_cols) if required_cols is not None else None
+    return read(index_col=0, usecols=usecols)
+
+# Função para configurar a interface gráfica (oculta) e solicitar o arquivo
+def load_data_file(required_cols: list = None, file_path: str = None):
+    """
+    Lê o arquivo de dados (CSV ou Excel) file_path; sem ele, abre uma janela de diálogo para selecioná-lo.
+    Com required_cols, só essas colunas (e a primeira, usada como índice) são lidas do arquivo.
+    """
+    if file_path is None:
+        # Importação adiada (como as do scipy e matplotlib abaixo): só é feita quando
+        # a janela é de fato aberta, o que encurta a inicialização dos scripts
+        from tkinter import Tk, filedialog
+        
+        # Configura a janela principal do Tkinter, mas a mantém oculta
+        root = Tk()
+        root.withdraw() 
+        
+        file_path = filedialog.askopenfilename(
+            title="Selecione o arquivo de Dados de Sobrevida (CSV ou Excel)",
+            filetypes=[
+                ("Arquivos Excel", "*.xlsx"),
+                ("Arquivos CSV", "*.csv"), 
+                ("Todos os arquivos", "*.*")
+            ]
+        )
+    
+    # Verifica se o usuário cancelou a seleção
+    if not file_path:
+        print("Nenhum arquivo selecionado. Encerrando o programa.")
+        sys.exit(0)
+    
+    def read():
+        if file_path.lower().endswith('.csv'):
+            # Leitura de arquivo CSV (com required_cols, as colunas são escolhidas pela posição no cabeçalho)
+            if required_cols is not None:
+                return read_csv_columns(file_path, required_cols, MOTOR_CSV)
+            return pd.read_csv(file_path, index_col=0, engine=MOTOR_CSV)
+        elif file_path.lower().endswith(('.xlsx', '.xls')):
+            # Leitura de arquivo Excel
+            # Tenta ler a planilha chamada 'Dados_Sobrevida', se existir
+            sheet_name_to_load = 'Dados_Sobrevida'
+            try:
+                return read_excel_sheet(file_path, sheet_name_to_load, required_cols)
+            except ValueError:
+                print(f"Aviso: Planilha '{sheet_name_to_load}' não encontrada. Tentando carregar a primeira planilha (índice 0).")
+                return read_excel_sheet(file_path, 0, required_cols)
+        else:
+            print("Formato de arquivo não suportado. Por favor, selecione .csv ou .xlsx.")
+            sys.exit(1)
+    
+    # Tenta carregar os dados
+    try:
+        # Cópia em Parquet ao lado do arquivo (uma por conjunto de colunas lidas)
+        data = read_cached(file_path, ('dados', required_cols), read)
+        
+        # Limpar nomes de colunas (remover espaços em branco) para evitar KeyErrors comuns
+        # (poucas colunas: uma compreensão de lista sai mais barata que o acessor .str do pandas)
+        data.columns = pd.Index([col.strip() if isinstance(col, str) else col for col in data.columns])
+            
+        print(f"Arquivo carregado com sucesso: {file_path}")
+        return data
+    except Exception as e:
+        print(f"Erro ao carregar o arquivo: {e}")
+        # Uma saída limpa sem usar messagebox
+        sys.exit(1)
+
+def load_expression_csv(file_path: str, columns: list, genes: list) -> pd.DataFrame:
+    """
+    Lê do CSV do Script 1 só o índice (ID da amostra) e as colunas pedidas (usada pelos scripts s3_mamanalysis_*);
+    as ausentes no arquivo são ignoradas aqui e informadas pela verificação de quem chama.
+    Os genes só são comparados com zero (expresso > 0): float32 basta e reduz pela metade a memória.
+    """
+    dtype = {gene: np.float32 for gene in genes}
+    options = {} if MOTOR_CSV == 'pyarrow' else {'low_memory': False}
+    # Cópia em Parquet só com as colunas usadas (uma por conjunto de colunas e tipos)
+    return read_cached(file_path, ('csv', list(columns), dtype),
+                       lambda: read_csv_columns(file_path, columns, MOTOR_CSV, dtype=dtype, **options))
+
+def sum_gene_expression(expression: np.ndarray, gene_index: dict, gene_list: list):
+    """
+    Calcula a expressão AGREGADA (SOMA) dos genes na lista, a partir da matriz de expressão
+    já extraída do DataFrame (gene_index: gene -> coluna da matriz).
+    Retorna None se nenhum dos genes estiver presente.
+    """
+    # 1. Calcular a expressão AGREGADA (SOMA) dos genes no grupo
+    # A coluna de tempo e evento não devem ser incluídas no cálculo
+    expression_cols = [gene_index[gene] for gene in gene_list if gene in gene_index]
+    
+    if not expression_cols:
+        print(f"Erro: Nenhum dos genes {gene_list} foi encontrado no DataFrame.")
+        return None
+
+    # Usando a SOMA (sum) para agregar a expressão, conforme solicitado pelo usuário.
+    # (nansum: valores ausentes contam como zero, como no sum do pandas)
+    return np.nansum(expression[:, expression_cols], axis=1)
+
+def two_group_labels(in_first: np.ndarray, categories: list) -> pd.Categorical:
+    """
+    Rótulos de uma comparação de dois grupos: categories[0] onde in_first é True e
+    categories[1] onde é False (comparação vetorizada em uma única passada).
+    
+    Os rótulos são categóricos (códigos int8, em vez de uma string por amostra); as categorias
+    são passadas em ordem alfabética, a mesma ordem em que os grupos apareciam nos gráficos
+    com rótulos de texto.
+    """
+    return pd.Categorical.from_codes((~in_first).astype(np.int8), categories=categories)
+
+def create_survival_groups(sum_expression: np.ndarray) -> pd.Categorical:
+    """
+    Divide as amostras em grupos de Alta e Baixa Expressão com base na mediana da soma
+    da expressão já calculada (sum_gene_expression). Retorna os rótulos dos grupos
+    (um por amostra, na ordem do DataFrame).
+    
+    As regras de corte (cutoff) são:
+    - Alta Expressão: Expressão Agregada >= Mediana
+    - Baixa Expressão: Expressão Agregada < Mediana
+    """
+    # 2. Definir o ponto de corte (mediana)
+    # O ponto de corte é a mediana da soma das expressões (np.median usa seleção parcial,
+    # sem ordenar o array, e tira a média dos dois valores centrais quando n é par, como o pandas)
+    median_expression = np.median(sum_expression)
+    
+    # 3. Criar a coluna de grupo de sobrevida
+    # Corte: >= Mediana para Alta Expressão, < Mediana para Baixa Expressão.
+    groups = two_group_labels(sum_expression >= median_expression,
+                              categories=['Alta Expressão', 'Baixa Expressão'])
+    
+    return groups
+
+def kaplan_meier_curve(T: np.ndarray, E: np.ndarray, alpha: float = 0.05):
+    """
+    Estimador de Kaplan-Meier calculado direto com NumPy (sem o KaplanMeierFitter do lifelines).
+    Retorna os tempos (começando em 0), a sobrevida S(t) e os limites do intervalo de confiança,
+    pelo mesmo método do lifelines (Greenwood exponencial / log(-log)).
+    """
+    from scipy.stats import norm
+    
+    times, position = np.unique(T, return_inverse=True)
+    deaths = np.bincount(position, weights=E, minlength=len(times))
+    removed = np.bincount(position, minlength=len(times))
+    # Em risco em cada tempo: todas as amostras menos as que saíram (óbito ou censura) antes dele
+    at_risk = len(T) - np.r_[0, np.cumsum(removed)[:-1]]
+    survival = np.cumprod(1.0 - deaths / at_risk)
+
+    z = norm.ppf(1 - alpha / 2)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        greenwood_error = np.sqrt(np.cumsum(deaths / (at_risk * (at_risk - deaths))))
+        log_s = np.log(survival)
+        ci_upper = np.exp(-np.exp(np.log(-log_s) - z * greenwood_error / log_s))
+        ci_lower = np.exp(-np.exp(np.log(-log_s) + z * greenwood_error / log_s))
+    # Como no lifelines, os limites indefinidos (onde S(t) = 1 ou 0) valem 1
+    ci_upper = np.nan_to_num(ci_upper, nan=1.0)
+    ci_lower = np.nan_to_num(ci_lower, nan=1.0)
+
+    if times[0] > 0:
+        times = np.r_[0.0, times]
+        survival, ci_lower, ci_upper = np.r_[1.0, survival], np.r_[1.0, ci_lower], np.r_[1.0, ci_upper]
+    return times, survival, ci_lower, ci_upper
+
+def logrank_z(T_A: np.ndarray, E_A: np.ndarray, T_B: np.ndarray, E_B: np.ndarray, compiled: bool = None) -> float:
+    """
+    Estatística z do log-rank para 2 grupos: (observados - esperados) / desvio padrão no grupo A.
+    compiled escolhe o laço do Numba ou a versão NumPy (padrão: o Numba, se instalado).
+    
+    Quando a variância é zero (ex: nenhum óbito nos dois grupos), observados - esperados também é
+    zero em todos os tempos de evento; o z é 0 (p-valor 1), como no lifelines (que usa a pseudo-inversa).
+    """
+    death_A, death_B = E_A.astype(bool), E_B.astype(bool)
+    
+    if compiled is None:
+        compiled = njit is not None
+    if compiled:
+        # Versão compilada: as amostras dos dois grupos são ordenadas por tempo uma única vez
+        times = np.concatenate([T_A, T_B]).astype(np.float64)
+        order = np.argsort(times, kind='stable')
+        group_b = np.concatenate([np.zeros(len(T_A), dtype=np.bool_), np.ones(len(T_B), dtype=np.bool_)])
+        return logrank_kernel(times[order], np.concatenate([death_A, death_B])[order], group_b[order])
+    
+    times = np.unique(np.concatenate([T_A[death_A], T_B[death_B]]))
+    # Em risco em cada tempo t: amostras com T >= t
+    n_A = len(T_A) - np.searchsorted(np.sort(T_A), times, side='left')
+    n_B = len(T_B) - np.searchsorted(np.sort(T_B), times, side='left')
+    # Óbitos em cada tempo t
+    d_A = np.bincount(np.searchsorted(times, T_A[death_A]), minlength=len(times))
+    d_B = np.bincount(np.searchsorted(times, T_B[death_B]), minlength=len(times))
+
+    n, d = n_A + n_B, d_A + d_B
+    expected_A = d * n_A / n
+    # Variância hipergeométrica; nos tempos com uma única amostra em risco ela é zero
+    variance = np.divide(n_A * n_B * d * (n - d), n ** 2 * (n - 1.0),
+                         out=np.zeros(len(times)), where=n > 1)
+    total_variance = variance.sum()
+    if total_variance == 0:
+        return 0.0
+    return (d_A.sum() - expected_A.sum()) / np.sqrt(total_variance)
+
+def logrank_two_groups(T_A: np.ndarray, E_A: np.ndarray, T_B: np.ndarray, E_B: np.ndarray) -> float:
+    """
+    Teste Log-Rank para 2 grupos (mesma estatística do logrank_test do lifelines), calculado
+    direto sobre os arrays: óbitos observados e esperados no grupo A em cada tempo de evento.
+    Retorna o p-valor.
+    """
+    from scipy.stats import chi2
+    
+    return chi2.sf(logrank_z(T_A, E_A, T_B, E_B) ** 2, 1)
+
+def check_logrank_paths():
+    """
+    Confere que as versões NumPy e Numba do log-rank dão o mesmo p-valor, inclusive sem óbitos
+    (variância zero, p-valor 1 como no lifelines) e em um caso com óbitos nos dois grupos.
+    """
+    from scipy.stats import chi2
+    
+    cases = {
+        'sem óbitos': (np.array([5.0, 8.0, 12.0]), np.zeros(3), np.array([3.0, 8.0, 20.0]), np.zeros(3)),
+        'com óbitos': (np.array([5.0, 8.0, 12.0, 15.0]), np.array([1.0, 0.0, 1.0, 1.0]),
+                       np.array([3.0, 8.0, 20.0]), np.array([0.0, 1.0, 1.0])),
+    }
+    for name, (T_A, E_A, T_B, E_B) in cases.items():
+        p_numpy = chi2.sf(logrank_z(T_A, E_A, T_B, E_B, compiled=False) ** 2, 1)
+        print(f"Log-rank ({name}): p-valor NumPy = {p_numpy:.6f}")
+        if name == 'sem óbitos':
+            assert p_numpy == 1.0, p_numpy
+        if njit is not None:
+            p_numba = chi2.sf(logrank_z(T_A, E_A, T_B, E_B, compiled=True) ** 2, 1)
+            print(f"Log-rank ({name}): p-valor Numba = {p_numba:.6f}")
+            assert np.isclose(p_numpy, p_numba), (p_numpy, p_numba)
+        else:
+            print("Numba não instalado: só a versão NumPy foi conferida.")
+
+def compute_km(T_high: np.ndarray, E_high: np.ndarray, T_low: np.ndarray, E_low: np.ndarray):
+    """
+    Ajusta as curvas de Kaplan-Meier dos dois grupos e realiza o teste log-rank, sem desenhar nada.
+    Retorna as duas curvas (Alta e Baixa Expressão) como arrays NumPy
+    (tempos, sobrevida, limite inferior e superior do IC) e o p-valor.
+    """
+    return (kaplan_meier_curve(T_high, E_high), kaplan_meier_curve(T_low, E_low),
+            logrank_two_groups(T_high, E_high, T_low, E_low))
+
+def plot_survival(df: pd.DataFrame, group_column: str, gene_list_str: str, time_col: str, event_col: str, fig_title: str, ax):
+    """
+    Plota as curvas de Kaplan-Meier e realiza o teste log-rank no eixo recebido
+    (os grupos de genes dividem a mesma figura, salva e exibida uma única vez em run).
+    """
+    # Colunas de Sobrevida (arrays NumPy: sem alinhamento de índice no KM e no log-rank)
+    T = df[time_col].to_numpy(dtype=np.float64)
+    E = df[event_col].to_numpy(dtype=np.float64)
+    # Como o lifelines fazia, valores ausentes de tempo/evento interrompem a análise
+    if np.isnan(T).any() or np.isnan(E).any():
+        raise ValueError(f"Valores ausentes nas colunas de sobrevida '{time_col}'/'{event_col}'.")
+    
+    # Separar os grupos (cada grupo é recortado uma única vez e reaproveitado abaixo)
+    groups = df[group_column].to_numpy()
+    high_exp = groups == 'Alta Expressão'
+    low_exp = groups == 'Baixa Expressão'
+    n_high, n_low = int(high_exp.sum()), int(low_exp.sum())
+    T_high, E_high = T[high_exp], E[high_exp]
+    T_low, E_low = T[low_exp], E[low_exp]
+
+    # Verificar se há dados suficientes nos grupos
+    if n_high < 2 or n_low < 2:
+        ax.set_title(f"Sobrevida Agregada: {gene_list_str} - Dados Insuficientes", fontsize=12, fontweight='bold')
+        ax.text(0.5, 0.5, "Dados insuficientes (n < 2 em um ou ambos os grupos).", 
+                  transform=ax.transAxes, ha='center', va='center', color='red')
+        ax.grid(False)
+        ax.axis('off') # Oculta os eixos
+        return
+        
+    # 1. Ajustar o modelo Kaplan-Meier (KM) e 2. Teste Log-Rank (cálculo separado do desenho)
+    curve_high, curve_low, p_value = compute_km(T_high, E_high, T_low, E_low)
+    
+    # Curvas desenhadas direto dos arrays: degraus + faixa do IC de 95%
+    # Grupo de Alta Expressão (Vermelho sólido) e de Baixa Expressão (Azul tracejado)
+    for (times, survival, ci_lower, ci_upper), label, color, linestyle in (
+            (curve_high, f'Alta Expressão (n={n_high})', 'red', '-'),
+            (curve_low, f'Baixa Expressão (n={n_low})', 'blue', '--')):
+        ax.step(times, survival, where='post', label=label, color=color, linewidth=2, linestyle=linestyle)
+        ax.fill_between(times, ci_lower, ci_upper, step='post', alpha=0.3, color=color, linewidth=0)
+    
+    # 3. Configuração do Gráfico
+    ax.set_title(fig_title, fontsize=14, fontweight='bold')
+    ax.set_xlabel("Tempo (Dias)")
+    ax.set_ylabel("Probabilidade de Sobrevida Global (S(t))")
+    
+    # Adicionar o P-valor (POSIÇÃO AJUSTADA para 0.20 para subir mais a legenda)
+    ax.text(0.05, 0.20, f"Teste Log-rank P-value: {p_value:.4f}", 
+              transform=ax.transAxes, fontsize=12, 
+              bbox=dict(facecolor='white', alpha=0.8, edgecolor='black', boxstyle='round,pad=0.5'))
+    
+    # Garante a legenda de cores
+    ax.legend(loc='lower left', frameon=True, fontsize=12, title='Grupos de Expressão') 
+    
+    # Configuração estética (Limites do eixo Y; grade e linhas de eixo vêm do rcParams definido em set_plot_style)
+    ax.set_ylim(0.0, 1.05)
+
+def save_axis(fig, ax, save_path: str):
+    """Salva só a área de um eixo da figura (com título, rótulos e legenda) no arquivo save_path."""
+    try:
+        bbox = ax.get_tightbbox(fig.canvas.get_renderer()).transformed(fig.dpi_scale_trans.inverted())
+        fig.savefig(save_path, bbox_inches=bbox.expanded(1.02, 1.02))
+        print(f"Gráfico salvo com sucesso em: {os.path.abspath(save_path)}")
+    except Exception as e:
+        print(f"Erro ao salvar o gráfico: {e}")
+
+# Colunas de sobrevida esperadas no arquivo (Ajuste aqui se o nome for diferente no seu arquivo)
+TIME_COL = 'OS_Time_nature2012'
+EVENT_COL = 'OS_event_nature2012'
+
+def load_survival_data(gene_groups: list, file_path: str = None) -> pd.DataFrame:
+    """
+    Lê o arquivo de dados file_path (sem ele, pede o arquivo pela janela de diálogo) e lê só as colunas de sobrevida e dos genes de todos os grupos
+    (gene_groups: lista de (genes, coluna do grupo, arquivo do gráfico ou None)).
+    O DataFrame devolvido pode alimentar várias chamadas de run, com uma única leitura.
+    """
+    genes = [gene for gene_list, _, _ in gene_groups for gene in gene_list]
+    df = load_data_file([TIME_COL, EVENT_COL, *dict.fromkeys(genes)], file_path)
+    
+    # VERIFICAÇÃO DE ERRO: Garante que as colunas de sobrevida existem
+    if TIME_COL not in df.columns or EVENT_COL not in df.columns:
+        print("\nERRO CRÍTICO: As colunas de Sobrevida não foram encontradas.")
+        print(f"O script está procurando por: Tempo='{TIME_COL}' e Evento='{EVENT_COL}'")
+        print(f"Colunas encontradas no seu arquivo: {list(df.columns)}")
+        print("\n** Ação necessária: ** Por favor, atualize as variáveis TIME_COL e EVENT_COL em survival_common.py com os nomes exatos das colunas do seu arquivo.")
+        sys.exit(1)
+    
+    # O índice (ID da amostra) não é usado na análise
+    return df.reset_index(drop=True)
+
+def set_plot_style():
+    """
+    Estilo dos gráficos de sobrevida (chamado antes de criar a figura): ggplot, grade pontilhada e
+    sem as linhas de eixo superior/direita em todos os eixos criados a seguir (definidas uma vez
+    aqui, em vez de ajustadas eixo a eixo em plot_survival).
+    """
+    import matplotlib.pyplot as plt
+    
+    plt.style.use('ggplot')
+    plt.rcParams.update({
+        'axes.spines.right': False,
+        'axes.spines.top': False,
+        'axes.grid': True,
+        'grid.linestyle': ':',
+        'grid.alpha': 0.7,
+    })
+
+def run(gene_groups: list, df: pd.DataFrame = None, show: bool = True, file_path: str = None):
+    """
+    Executa a análise de sobrevida para cada grupo de genes (genes, coluna do grupo, arquivo do gráfico ou None),
+    um gráfico por grupo, lado a lado na mesma figura. Sem df, os dados são carregados aqui com load_survival_data.
+    Com show=False (execução em lote, com file_path), os gráficos são apenas salvos, sem abrir janela.
+    """
+    if df is None:
+        df = load_survival_data(gene_groups, file_path)
+    
+    # Configuração global de estilo para os gráficos (matplotlib só é importado aqui, depois da leitura)
+    import matplotlib
+    if not show:
+        # Execução em lote: backend sem interface gráfica
+        matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    set_plot_style()
+    
+    # Uma única figura com os gráficos lado a lado (um eixo por grupo de genes)
+    fig, axes = plt.subplots(1, len(gene_groups), figsize=(9 * len(gene_groups), 7), squeeze=False)
+    axes = axes[0]
+    
+    # Matriz de expressão com os genes de todos os grupos, extraída do DataFrame uma única vez;
+    # as somas de cada grupo saem de fatias dela (os genes em comum entre grupos não são relidos)
+    all_genes = [gene for gene in dict.fromkeys(gene for gene_list, _, _ in gene_groups for gene in gene_list)
+                 if gene in df.columns]
+    expression = df[all_genes].to_numpy(dtype=np.float64)
+    gene_index = {gene: i for i, gene in enumerate(all_genes)}
+    
+    for number, ((gene_list, group_column, _), ax) in enumerate(zip(gene_groups, axes), start=1):
+        print(f"\n--- Processando Grupo {number}: {gene_list} ---")
+        sum_expression = sum_gene_expression(expression, gene_index, gene_list)
+        if sum_expression is not None:
+            # Só a coluna de grupo é acrescentada ao DataFrame (sem copiá-lo para cada grupo)
+            df[group_column] = create_survival_groups(sum_expression)
+            title = f"Curvas de Sobrevida de Kaplan-Meier\nExpressão Agregada (Soma) do Grupo: {', '.join(gene_list)}"
+            plot_survival(df, group_column, ", ".join(gene_list), TIME_COL, EVENT_COL, title, ax=ax)
+        else:
+            ax.axis('off')
+    
+    # Um único ajuste de layout para todos os eixos
+    plt.tight_layout()
+    
+    # Cada grupo com arquivo definido continua com o seu próprio PNG (recorte do seu eixo na figura)
+    for (_, _, save_path), ax in zip(gene_groups, axes):
+        if save_path:
+            save_axis(fig, ax, save_path)
+    
+    # Uma única exibição (pode falhar em ambientes headless)
+    if show:
+        plt.show()
+
+if __name__ == '__main__':
+    # Verificação rápida das duas versões do log-rank: python survival_common.py
+    check_logrank_paths()
\ No newline at end of file
@@ -1,170 +1,40 @@
 import pandas as pd
-from lifelines import KaplanMeierFitter
-from lifelines.statistics import logrank_test
+import numpy as np
 import matplotlib.pyplot as plt
-from tkinter import Tk, filedialog
 import sys
+# Leitura do arquivo de dados, soma da expressão, gráfico de Kaplan-Meier (com o log-rank) e estilo compartilhados
+from survival_common import load_data_file, sum_gene_expression, plot_survival, set_plot_style
 
-# Configuração global de estilo para os gráficos
-plt.style.use('ggplot')
-
-# Função para configurar a interface gráfica (oculta) e solicitar o arquivo
-def load_data_file():
-    """Abre uma janela de diálogo para selecionar o arquivo de dados (CSV ou Excel)."""
-    # Configura a janela principal do Tkinter, mas a mantém oculta
-    root = Tk()
-    # Impede que a janela principal apareça
-    root.withdraw() 
-    
-    # Abre a caixa de diálogo para seleção do arquivo
-    file_path = filedialog.askopenfilename(
-        title="Selecione o arquivo de Dados de Sobrevida (CSV ou Excel)",
-        filetypes=[
-            ("Arquivos Excel", "*.xlsx"),
-            ("Arquivos CSV", "*.csv"), 
-            ("Todos os arquivos", "*.*")
-        ]
-    )
-    
-    # Verifica se o usuário cancelou a seleção
-    if not file_path:
-        print("Nenhum arquivo selecionado. Encerrando o programa.")
-        sys.exit(0)
-    
-    # Tenta carregar os dados
-    try:
-        if file_path.lower().endswith('.csv'):
-            # Leitura de arquivo CSV
-            # Assumindo que a primeira coluna é o índice (índice 0)
-            data = pd.read_csv(file_path, index_col=0)
-        elif file_path.lower().endswith(('.xlsx', '.xls')):
-            # Leitura de arquivo Excel
-            # Tenta ler a planilha chamada 'Dados_Sobrevida', se existir
-            sheet_name_to_load = 'Dados_Sobrevida'
-            try:
-                data = pd.read_excel(file_path, sheet_name=sheet_name_to_load, index_col=0)
-            except ValueError:
-                print(f"Aviso: Planilha '{sheet_name_to_load}' não encontrada. Tentando carregar a primeira planilha (índice 0).")
-                data = pd.read_excel(file_path, sheet_name=0, index_col=0)
-        else:
-            print("Formato de arquivo não suportado. Por favor, selecione .csv ou .xlsx.")
-            sys.exit(1)
-            
-        # Limpar nomes de colunas (remover espaços em branco) para evitar KeyErrors comuns
-        data.columns = data.columns.str.strip()
-            
-        print(f"Arquivo carregado com sucesso: {file_path}")
-        return data
-    except Exception as e:
-        print(f"Erro ao carregar o arquivo: {e}")
-        # Uma saída limpa
-        sys.exit(1)
-
-def create_survival_groups(df: pd.DataFrame, gene_list: list, group_title: str) -> pd.DataFrame:
+def create_survival_groups(df: pd.DataFrame, sum_expression: np.ndarray, group_title: str,
+                           time_col: str, event_col: str) -> pd.DataFrame:
     """
-    Calcula a SOMA da expressão dos genes na lista e divide as amostras
-    em grupos de Alta (> mediana) e Baixa (< mediana) Expressão,
-    excluindo amostras exatamente iguais à mediana.
+    Divide as amostras em grupos de Alta (> mediana) e Baixa (< mediana) Expressão
+    pela soma da expressão já calculada (sum_gene_expression), excluindo amostras
+    exatamente iguais à mediana. O DataFrame de entrada não é alterado; o retorno
+    traz só as colunas de tempo, evento e grupo (as únicas usadas no gráfico).
     """
-    # 1. Calcular a expressão AGREGADA (SOMA) dos genes no grupo
-    expression_cols = [gene for gene in gene_list if gene in df.columns]
-    
-    if not expression_cols:
-        print(f"Erro: Nenhum dos genes {gene_list} foi encontrado no DataFrame.")
-        return None
-
-    # Usando a soma (sum) da expressão
-    df['sum_expression'] = df[expression_cols].sum(axis=1)
-    
     # 2. Definir o ponto de corte (mediana)
-    median_expression = df['sum_expression'].median()
-    
-    # 3. Criar a coluna de grupo de sobrevida com corte estrito
-    # Inicializa todas as amostras como 'Excluído'
-    df[group_title] = 'Excluído' 
+    median_expression = np.median(sum_expression)
     
+    # 3. Criar os grupos de sobrevida com corte estrito, em uma única passada:
     # Alta Expressão: Estritamente maior que a mediana (x > mediana)
-    df.loc[df['sum_expression'] > median_expression, group_title] = 'Alta Expressão'
-    
     # Baixa Expressão: Estritamente menor que a mediana (x < mediana)
-    df.loc[df['sum_expression'] < median_expression, group_title] = 'Baixa Expressão'
+    # Excluído: exatamente igual à mediana
+    groups = np.where(sum_expression > median_expression, 'Alta Expressão',
+                      np.where(sum_expression < median_expression, 'Baixa Expressão', 'Excluído'))
     
     # 4. FILTRAGEM: Remove as amostras que ficaram exatamente na mediana ('Excluído')
-    df_filtered = df[df[group_title] != 'Excluído'].copy()
+    keep = groups != 'Excluído'
+    df_filtered = df.loc[keep, [time_col, event_col]].copy()
+    df_filtered[group_title] = groups[keep]
     
     # Informar o usuário sobre as amostras excluídas
     excluded_count = len(df) - len(df_filtered)
     if excluded_count > 0:
         print(f"\nAviso de Grupo: No grupo '{group_title}', {excluded_count} amostra(s) com expressão exatamente igual à mediana foram EXCLUÍDAS da análise.")
-        
-    # Remove a coluna temporária de soma
-    df_filtered = df_filtered.drop(columns=['sum_expression'])
     
     return df_filtered
 
-def plot_survival(df: pd.DataFrame, group_column: str, gene_list_str: str, time_col: str, event_col: str, fig_title: str):
-    """
-    Plota as curvas de Kaplan-Meier e realiza o teste log-rank.
-    Cria uma nova figura para ser exibida separadamente.
-    """
-    # Cria uma nova figura e eixo para cada plotagem
-    fig, ax = plt.subplots(1, 1, figsize=(9, 7))
-    
-    # Colunas de Sobrevida
-    T = df[time_col]
-    E = df[event_col]
-    
-    # Separar os grupos
-    high_exp = (df[group_column] == 'Alta Expressão')
-    low_exp = (df[group_column] == 'Baixa Expressão')
-
-    # Verificar se há dados suficientes nos grupos
-    if high_exp.sum() < 2 or low_exp.sum() < 2:
-        ax.set_title(f"Sobrevida Agregada: {gene_list_str} - Dados Insuficientes", fontsize=12, fontweight='bold')
-        ax.text(0.5, 0.5, "Dados insuficientes (n < 2 em um ou ambos os grupos).", 
-                  transform=ax.transAxes, ha='center', va='center', color='red')
-        ax.grid(False)
-        ax.axis('off') # Oculta os eixos
-        plt.tight_layout()
-        plt.show()
-        return
-        
-    # 1. Ajustar o modelo Kaplan-Meier (KM)
-    kmf = KaplanMeierFitter()
-    
-    # Grupo de Alta Expressão (Vermelho sólido)
-    kmf.fit(T[high_exp], E[high_exp], label=f'Alta Expressão (n={high_exp.sum()})')
-    kmf.plot_survival_function(ax=ax, ci_show=True, color='red', linewidth=2)
-    
-    # Grupo de Baixa Expressão (Azul tracejado)
-    kmf.fit(T[low_exp], E[low_exp], label=f'Baixa Expressão (n={low_exp.sum()})')
-    kmf.plot_survival_function(ax=ax, ci_show=True, color='blue', linewidth=2, linestyle='--')
-    
-    # 2. Teste Log-Rank
-    results = logrank_test(T[high_exp], T[low_exp], E[high_exp], E[low_exp], alpha=.99)
-    p_value = results.p_value
-    
-    # 3. Configuração do Gráfico
-    ax.set_title(fig_title, fontsize=14, fontweight='bold')
-    ax.set_xlabel("Tempo (Dias)")
-    ax.set_ylabel("Probabilidade de Sobrevida Global (S(t))")
-    
-    # Adicionar o P-valor (POSIÇÃO AJUSTADA)
-    ax.text(0.05, 0.20, f"Teste Log-rank P-value: {p_value:.4f}", 
-              transform=ax.transAxes, fontsize=12, 
-              bbox=dict(facecolor='white', alpha=0.8, edgecolor='black', boxstyle='round,pad=0.5'))
-    
-    ax.grid(True, linestyle=':', alpha=0.7)
-    # Garante a legenda de cores
-    ax.legend(loc='lower left', frameon=True, fontsize=12, title='Grupos de Expressão') 
-    
-    # Configuração estética (Limites do eixo Y, linhas de eixo)
-    ax.set_ylim(0.0, 1.05)
-    ax.spines['right'].set_visible(False)
-    ax.spines['top'].set_visible(False)
-    
-    plt.tight_layout()
-
 def main():
     # 1. Carregar os dados
     print("Iniciando a análise de sobrevida...")
@@ -198,24 +68,39 @@ def main():
     GENES_G2 = ['IL33', 'IL25', 'TSLP']
     GROUP_COL_2 = 'Grupo_IL33_IL25_TSLP_STRICT'
     
+    # Matriz de expressão com os genes dos dois grupos, extraída do DataFrame uma única vez;
+    # as somas de cada grupo saem de fatias dela (sem copiar o DataFrame inteiro por grupo)
+    all_genes = [gene for gene in dict.fromkeys(GENES_G1 + GENES_G2) if gene in df.columns]
+    expression = df[all_genes].to_numpy(dtype=np.float64)
+    gene_index = {gene: i for i, gene in enumerate(all_genes)}
+    
+    # Uma única figura com os dois gráficos lado a lado (um eixo por grupo de genes)
+    set_plot_style()
+    fig, axes = plt.subplots(1, 2, figsize=(18, 7))
     
     # --- GRÁFICO 1: Análise do Grupo 1: [IL5, IL33, IL25, TSLP] ---
     print(f"\n--- Processando Grupo 1: {GENES_G1} ---")
-    df_g1 = create_survival_groups(df.copy(), GENES_G1, GROUP_COL_1)
+    sum_g1 = sum_gene_expression(expression, gene_index, GENES_G1)
+    df_g1 = create_survival_groups(df, sum_g1, GROUP_COL_1, TIME_COL, EVENT_COL) if sum_g1 is not None else None
     if df_g1 is not None:
         title_g1 = f"Curvas de Sobrevida de Kaplan-Meier (Corte Estrito)\nExpressão Agregada do Grupo: {', '.join(GENES_G1)}"
-        plot_survival(df_g1, GROUP_COL_1, ", ".join(GENES_G1), TIME_COL, EVENT_COL, title_g1)
-        # Mostrar o primeiro gráfico
-        plt.show() 
+        plot_survival(df_g1, GROUP_COL_1, ", ".join(GENES_G1), TIME_COL, EVENT_COL, title_g1, ax=axes[0])
+    else:
+        axes[0].axis('off')
     
     # --- GRÁFICO 2: Análise do Grupo 2: [IL33, IL25, TSLP] ---
     print(f"\n--- Processando Grupo 2: {GENES_G2} ---")
-    df_g2 = create_survival_groups(df.copy(), GENES_G2, GROUP_COL_2)
+    sum_g2 = sum_gene_expression(expression, gene_index, GENES_G2)
+    df_g2 = create_survival_groups(df, sum_g2, GROUP_COL_2, TIME_COL, EVENT_COL) if sum_g2 is not None else None
     if df_g2 is not None:
         title_g2 = f"Curvas de Sobrevida de Kaplan-Meier (Corte Estrito)\nExpressão Agregada do Grupo: {', '.join(GENES_G2)}"
-        plot_survival(df_g2, GROUP_COL_2, ", ".join(GENES_G2), TIME_COL, EVENT_COL, title_g2)
-        # Mostrar o segundo gráfico
-        plt.show()
+        plot_survival(df_g2, GROUP_COL_2, ", ".join(GENES_G2), TIME_COL, EVENT_COL, title_g2, ax=axes[1])
+    else:
+        axes[1].axis('off')
+    
+    # Um único ajuste de layout para os dois eixos e uma única exibição
+    plt.tight_layout()
+    plt.show()
 
 if __name__ == "__main__":
     # Garante que o Tkinter não inicie a janela principal, apenas o filedialog